@@ -1,4 +1,4 @@
-from passrotate.provider import get_provider, get_providers
+from passrotate.provider import get_provider, get_providers, resolve_providers
 import passrotate.providers
 from getpass import getpass
 
@@ -8,16 +8,26 @@ def _getpass_prompt(prompt, prompt_type):
 class PassRotate():
     def __init__(self):
         self.prompt = _getpass_prompt
+        self.timeout = None
+        self.url_map = None
+        self.tracer = None
 
     def get_provider_class(self, name):
         return get_provider(name)
 
-    def get_provider(self, name, options):
+    def get_provider_classes(self, names):
+        return resolve_providers(names)
+
+    def get_provider(self, name, options, prompt=None, timeout=None, deadline=None):
         cls = self.get_provider_class(name)
         if not cls:
             return None
         instance = cls(options)
-        instance._prompt = self.prompt
+        instance._prompt = prompt or self.prompt
+        instance._timeout = timeout or self.timeout
+        instance._deadline = deadline
+        instance._url_map = self.url_map
+        instance._tracer = self.tracer
         return instance
 
     def get_providers(self):
@@ -25,3 +35,12 @@ class PassRotate():
 
     def set_prompt(self, prompt):
         self.prompt = prompt
+
+    def set_timeout(self, timeout):
+        self.timeout = timeout
+
+    def set_url_map(self, url_map):
+        self.url_map = url_map
+
+    def set_tracer(self, tracer):
+        self.tracer = tracer
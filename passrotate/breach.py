@@ -0,0 +1,82 @@
+import hashlib
+import mmap
+import re
+
+_text_record = re.compile(rb"[0-9A-Fa-f]{40}(:\d+)?\r?(\n|$)")
+
+
+class BreachIndex:
+    """Looks up passwords in an offline dump of breached password hashes.
+
+    The dump is a file of SHA-1 hashes sorted in ascending order, either as
+    text in the format of Have I Been Pwned's downloads, one "HASH:count" per
+    line (the count is optional), or as binary 20-byte digests with nothing
+    between them. The file is memory-mapped and binary searched, so lookups
+    only touch a few pages even when the file is many gigabytes.
+    """
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            self._map = b""
+        self.binary = not _text_record.match(self._map[:64])
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def count(self, password):
+        """Returns how many times the password was seen in breaches.
+
+        Binary dumps do not record counts, so this returns 1 for a breached
+        password. Returns 0 if the password is not in the dump.
+        """
+        digest = hashlib.sha1(password.encode()).digest()
+        if self.binary:
+            return self._search_binary(digest)
+        return self._search_text(digest.hex().upper().encode())
+
+    def __contains__(self, password):
+        return self.count(password) > 0
+
+    def _search_binary(self, digest):
+        lo, hi = 0, len(self._map) // 20
+        while lo < hi:
+            mid = (lo + hi) // 2
+            record = self._map[mid * 20:mid * 20 + 20]
+            if record == digest:
+                return 1
+            if record < digest:
+                lo = mid + 1
+            else:
+                hi = mid
+        return 0
+
+    def _search_text(self, digest):
+        data = self._map
+        lo, hi = 0, len(data)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = data.rfind(b"\n", 0, mid) + 1
+            end = data.find(b"\n", start)
+            if end == -1:
+                end = len(data)
+            line = data[start:end].strip()
+            record = line[:40].upper()
+            if record == digest:
+                count = line[41:]
+                return int(count) if count.isdigit() else 1
+            if record < digest:
+                lo = end + 1
+            else:
+                hi = start
+        return 0
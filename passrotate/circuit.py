@@ -0,0 +1,75 @@
+import json
+import threading
+
+# Errors which mean a page no longer has the structure a provider expects,
+# e.g. soup.find returning None for a form which has moved
+STRUCTURAL_ERRORS = (AttributeError, IndexError, KeyError, TypeError,
+        json.JSONDecodeError)
+
+
+def is_structural(error):
+    return isinstance(error, STRUCTURAL_ERRORS)
+
+
+class CircuitBreaker:
+    """Stops rotating a provider's accounts once its flow appears broken.
+
+    When a service changes its markup, every account using its provider
+    fails in the same way, each after a full login. Once a provider has
+    failed with a structural error (see STRUCTURAL_ERRORS) for threshold
+    accounts in a row, its circuit opens and its remaining accounts should
+    be skipped. Other failures, like a wrong password or a timeout, neither
+    open the circuit nor reset the count.
+
+    Parameters:
+        threshold: The number of consecutive structural failures which open
+                   a provider's circuit. 0 disables the breaker.
+    """
+    def __init__(self, threshold=3):
+        self.threshold = threshold
+        self._failures = dict()
+        self._open = dict()
+        self._skipped = dict()
+        self._lock = threading.Lock()
+
+    def is_open(self, provider):
+        return provider in self._open
+
+    def record_success(self, provider):
+        with self._lock:
+            self._failures.pop(provider, None)
+
+    def record_failure(self, provider, error):
+        """Records a failed account for a provider.
+
+        Returns True if this failure opened the provider's circuit.
+        """
+        if not self.threshold or not is_structural(error):
+            return False
+        with self._lock:
+            if provider in self._open:
+                return False
+            self._failures[provider] = self._failures.get(provider, 0) + 1
+            if self._failures[provider] < self.threshold:
+                return False
+            self._open[provider] = "{}: {}".format(type(error).__name__, error)
+            return True
+
+    def skip(self, provider, account):
+        """Records an account which was skipped because the circuit is open."""
+        with self._lock:
+            self._skipped.setdefault(provider, list()).append(account)
+
+    def report(self):
+        """Summarizes the open circuits and the accounts they skipped.
+
+        Returns a string, which is empty if no circuit opened.
+        """
+        lines = list()
+        for provider, error in sorted(self._open.items()):
+            skipped = self._skipped.get(provider, list())
+            lines.append("{} failed {} times in a row ({}), skipped {} account{}{}".format(
+                provider, self.threshold, error, len(skipped),
+                "" if len(skipped) == 1 else "s",
+                ": " + ", ".join(sorted(skipped)) if skipped else ""))
+        return "".join(line + "\n" for line in lines)
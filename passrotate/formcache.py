@@ -0,0 +1,206 @@
+from typing import Callable, Dict, List
+from passrotate.forms import FormData, get_form
+import hashlib
+import html
+import json
+import os
+import re
+import threading
+import time
+
+_input_re = re.compile(r"<(input|select)\b([^>]*)>", re.IGNORECASE)
+_attr_re = re.compile(
+    r"""([^\s=/>"']+)(?:\s*=\s*("[^"]*"|'[^']*'|[^\s>]+))?""")
+
+
+def scan_inputs(text: str) -> List[Dict[str, str]]:
+    """Finds the attributes of every input and select element in a page.
+
+    This is a single regular expression scan over the raw text and does not
+    build a DOM, so it is much cheaper than get_form.
+
+    Parameters:
+        text: HTML text to be processed.
+
+    Returns a list of attribute dictionaries in document order. Each has an
+    additional "<tag>" key with the element name.
+    """
+    inputs = list()
+    for match in _input_re.finditer(text):
+        attrs = {"<tag>": match.group(1).lower()}
+        for name, value in _attr_re.findall(match.group(2)):
+            if value[:1] in ("'", '"'):
+                value = value[1:-1]
+            attrs.setdefault(name.lower(), html.unescape(value))
+        inputs.append(attrs)
+    return inputs
+
+
+def find_element(text: str, type: str = "form", **kwargs):
+    """Finds the first element of a type with the given attributes.
+
+    Like scan_inputs, this scans the raw text. Only string attribute values
+    are supported, compared exactly.
+
+    Returns the (start, end) span of the element in text, including its
+    closing tag, or None if it was not found.
+    """
+    if any(not isinstance(v, str) for v in kwargs.values()):
+        return None
+    open_re = re.compile(r"<{}\b([^>]*)>".format(re.escape(type)), re.IGNORECASE)
+    tag_re = re.compile(r"<(/?){}\b[^>]*>".format(re.escape(type)), re.IGNORECASE)
+    for match in open_re.finditer(text):
+        attrs = dict()
+        for name, value in _attr_re.findall(match.group(1)):
+            if value[:1] in ("'", '"'):
+                value = value[1:-1]
+            attrs.setdefault(name.lower(), html.unescape(value))
+        if any(attrs.get(k) != v for k, v in kwargs.items()):
+            continue
+        # Elements of the same type may be nested, e.g. divs
+        depth = 1
+        for tag in tag_re.finditer(text, match.end()):
+            depth += -1 if tag.group(1) else 1
+            if depth == 0:
+                return match.start(), tag.end()
+        return match.start(), len(text)
+    return None
+
+
+def _fingerprint(inputs, type, kwargs):
+    digest = hashlib.sha1()
+    digest.update(json.dumps([type, sorted(kwargs.items())]).encode())
+    for i in inputs:
+        digest.update("\0{}:{}".format(i["<tag>"], i.get("name", "")).encode())
+    return digest.hexdigest()
+
+
+class FormSchemaCache:
+    """Cache of learned form schemas.
+
+    A schema records the field names and default values of a form, and which
+    of them are volatile (hidden fields with a value, such as CSRF tokens).
+    Schemas are keyed by a provider-chosen name and validated against a
+    fingerprint of the field names present in the page. While the fingerprint
+    matches, the form is rebuilt from the schema and the volatile values
+    found by scan_inputs, and html5lib is not needed. When it changes, the
+    form is parsed with get_form and the schema is learned again.
+
+    Only the inputs inside the form itself, as found by find_element, are
+    compared and read, so other forms on the page do not affect it.
+
+    When asked to, forms with no volatile fields are not fetched at all,
+    provided that their schema was validated within the last revalidate
+    seconds.
+    """
+    def __init__(self, revalidate=86400):
+        self.revalidate = revalidate
+        self.schemas = dict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def load(self, path):
+        try:
+            with open(path) as f:
+                self.schemas = json.load(f)
+        except FileNotFoundError:
+            self.schemas = dict()
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            data = json.dumps(self.schemas, indent=2, sort_keys=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def invalidate(self, key):
+        with self._lock:
+            self.schemas.pop(key, None)
+
+    def get_form(self, key: str, fetch: Callable[[], str],
+                 type: str = "form", skip_fetch: bool = False,
+                 **kwargs) -> FormData:
+        """Gets the data from a form, using the learned schema if possible.
+
+        Parameters:
+            key: The cache key, conventionally "<provider name>.<form>".
+            fetch: A function which fetches the page and returns its text.
+            type: HTML element type to find in page.
+            skip_fetch: Do not call fetch if the cached schema is entirely
+                        static. Only use this if fetching the page has no
+                        effect which later requests rely on, such as setting
+                        session cookies.
+            **kwargs: Additional parameters to pass to `soup.find()`
+
+        Returns dictionary with (name, value) pairs from inputs from first
+        match.
+        """
+        schema = self.schemas.get(key)
+        if skip_fetch and schema and not schema["volatile"] and \
+                time.time() - schema["validated"] < self.revalidate:
+            with self._lock:
+                self.hits += 1
+            return dict(schema["fields"])
+
+        text = fetch()
+        span = find_element(text, type, **kwargs)
+        inputs = scan_inputs(text[span[0]:span[1]]) if span else list()
+        fingerprint = _fingerprint(inputs, type, kwargs)
+        if span and schema and schema["fingerprint"] == fingerprint:
+            values = dict()
+            for i in inputs:
+                values[i.get("name")] = i.get("value", "")
+            if all(name in values for name in schema["volatile"]):
+                form = dict(schema["fields"])
+                form.update({ name: values[name] for name in schema["volatile"] })
+                with self._lock:
+                    schema["validated"] = time.time()
+                    self.hits += 1
+                return form
+
+        with self._lock:
+            self.misses += 1
+        form = get_form(text, type=type, **kwargs)
+        if not span:
+            # The form cannot be found without a DOM, so it cannot be cached
+            return form
+        if set(i.get("name") for i in inputs if i.get("name")) != set(form):
+            # The text scan found a different form than the DOM did, such as
+            # one inside a comment or a script template, so later scans
+            # could not be trusted to find this form either
+            return form
+        hidden = set(i.get("name") for i in inputs
+                if i.get("type", "").lower() == "hidden" and i.get("value"))
+        with self._lock:
+            self.schemas[key] = {
+                "fingerprint": fingerprint,
+                "fields": form,
+                "volatile": sorted(name for name in form if name in hidden),
+                "validated": time.time(),
+            }
+        return dict(form)
+
+
+form_cache = FormSchemaCache()
+
+
+def get_cached_form(key: str, fetch: Callable[[], str],
+                    type: str = "form", **kwargs) -> FormData:
+    """Helper method to get the data from a form through the form cache.
+
+    See FormSchemaCache.get_form.
+    """
+    return form_cache.get_form(key, fetch, type=type, **kwargs)
+
+
+def default_form_cache_path():
+    if os.environ.get("XDG_CACHE_HOME"):
+        base = os.environ.get("XDG_CACHE_HOME")
+    else:
+        base = os.path.expanduser("~/.cache")
+    return os.path.join(base, "pass-rotate", "forms.json")
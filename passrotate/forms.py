@@ -1,9 +1,44 @@
-from typing import Dict, Callable
+from typing import Any, Dict, Callable, List, Union
 from bs4 import BeautifulSoup
 from bs4.element import ResultSet
+from concurrent.futures import ProcessPoolExecutor
+import html
+import json
+import multiprocessing
+import pickle
+import re
 
 FormData = Dict[str, str]
 
+_parse_pool = None
+
+
+def start_parse_pool(workers: int) -> None:
+    """Parses pages for get_form and custom_get_form in worker processes.
+
+    html5lib is pure Python and holds the GIL, so pages parsed on threads
+    are parsed one at a time. With a parse pool, only the page text is sent
+    to a worker process and only the resulting FormData comes back, so
+    concurrent rotations can parse on several cores.
+
+    Parameters:
+        workers: The number of worker processes.
+    """
+    global _parse_pool
+    context = None
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+    _parse_pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+    # Start the workers now, before the caller starts any threads
+    list(_parse_pool.map(int, range(workers)))
+
+
+def stop_parse_pool() -> None:
+    global _parse_pool
+    if _parse_pool:
+        _parse_pool.shutdown()
+        _parse_pool = None
+
 
 def get_form_data(inputs: ResultSet) -> FormData:
     """Returns data dictionary from list of BeautifulSoup input elements.
@@ -31,8 +66,14 @@ def get_form(text: str, type: str = "form", **kwargs) -> FormData:
 
     Returns dictionary with (name, value) pairs from inputs from first match.
     """
+    if _parse_pool:
+        return _parse_pool.submit(_get_form, text, type, kwargs).result()
+    return _get_form(text, type, kwargs)
+
+
+def _get_form(text, type, attrs):
     soup = BeautifulSoup(text, "html5lib")
-    form = soup.find(type, attrs=kwargs)
+    form = soup.find(type, attrs=attrs)
     inputs = form.find_all("input") + form.find_all("select")
     return get_form_data(inputs)
 
@@ -47,7 +88,86 @@ def custom_get_form(text: str,
               list of input objects from the form desired.
 
     Returns dictionary with (name, value) pairs from inputs returned by func.
+    If a parse pool is running, func must be a module level function so that
+    it can be sent to the worker processes, otherwise the page is parsed in
+    this process.
     """
+    if _parse_pool and _picklable(func):
+        return _parse_pool.submit(_custom_get_form, text, func).result()
+    return _custom_get_form(text, func)
+
+
+def _custom_get_form(text, func):
     soup = BeautifulSoup(text, "html5lib")
     inputs = func(soup)
     return get_form_data(inputs)
+
+
+def _picklable(obj):
+    try:
+        pickle.dumps(obj)
+        return True
+    except Exception:
+        return False
+
+
+_json_decoder = json.JSONDecoder()
+
+
+def get_assigned_json(text: Union[str, bytes],
+                      names: List[str]) -> Dict[str, Any]:
+    """Helper method to get JSON literals assigned to variables in a page.
+
+    This scans the raw page once for assignments like
+    `window.bootstrap = {...};` and decodes the literal that follows, without
+    building a DOM.
+
+    Parameters:
+        text: HTML text or bytes to be processed.
+        names: The variable names to look for, e.g. "window.currentUser".
+
+    Returns dictionary with (name, value) pairs for each name found. The first
+    assignment which decodes successfully is used for each name.
+    """
+    if isinstance(text, bytes):
+        text = text.decode("utf-8", errors="replace")
+    pattern = re.compile(r"(?<![\w.$])({})\s*=\s*".format(
+        "|".join(re.escape(n) for n in names)))
+    found = dict()
+    for match in pattern.finditer(text):
+        name = match.group(1)
+        if name in found:
+            continue
+        try:
+            found[name], _ = _json_decoder.raw_decode(text, match.end())
+        except ValueError:
+            continue
+        if len(found) == len(names):
+            break
+    return found
+
+
+_meta_tag = re.compile(r"<meta\b[^>]*>", re.IGNORECASE)
+_meta_attr = re.compile(r"""([\w-]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""")
+
+
+def get_meta_content(text: Union[str, bytes], name: str) -> Union[str, None]:
+    """Helper method to get the content of a named meta tag in a page.
+
+    Like get_assigned_json, this scans the raw page without building a DOM,
+    which is enough to find tokens like Rails' csrf-token.
+
+    Parameters:
+        text: HTML text or bytes to be processed.
+        name: The name attribute of the meta tag, e.g. "csrf-token".
+
+    Returns the tag's content attribute, or None if there is no such tag.
+    """
+    if isinstance(text, bytes):
+        text = text.decode("utf-8", errors="replace")
+    for tag in _meta_tag.finditer(text):
+        attrs = { m.group(1).lower(): m.group(2) or m.group(3) or m.group(4) or ""
+                for m in _meta_attr.finditer(tag.group(0)) }
+        if attrs.get("name") == name and "content" in attrs:
+            return html.unescape(attrs["content"])
+    return None
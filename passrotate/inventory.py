@@ -0,0 +1,225 @@
+from passrotate.provider import get_provider, resolve_providers, DomainIndex
+import csv
+import json
+import os
+import sqlite3
+
+
+def parse_tags(value):
+    return sorted(set((value or "").replace(",", " ").split()))
+
+
+class Account:
+    """A configured account.
+
+    Attributes:
+        name: The account name, also used to look up its password.
+        options: The account's options, as given to its provider.
+        provider: The provider class, or None if no provider matches.
+        tags: A list of tags for selecting groups of accounts.
+    """
+    __slots__ = ["name", "options", "provider", "tags"]
+
+    def __init__(self, name, options, provider):
+        self.name = name
+        self.options = options
+        self.provider = provider
+        self.tags = parse_tags(options.get("tags"))
+
+    @property
+    def domain(self):
+        return self.options.get("domain") or self.name
+
+
+class Inventory:
+    """An in-memory set of accounts, indexed by provider, domain and tag."""
+    def __init__(self, accounts=()):
+        self._accounts = dict()
+        self._by_provider = dict()
+        self._by_domain = dict()
+        self._by_tag = dict()
+        for account in accounts:
+            self.add(account)
+
+    def add(self, account):
+        self._accounts[account.name] = account
+        if account.provider:
+            self._by_provider.setdefault(account.provider.name, set()).add(account.name)
+        domain = DomainIndex.normalize(account.domain)
+        self._by_domain.setdefault(domain, set()).add(account.name)
+        for tag in account.tags:
+            self._by_tag.setdefault(tag, set()).add(account.name)
+
+    def get(self, name):
+        return self._accounts.get(name)
+
+    def __contains__(self, name):
+        return name in self._accounts
+
+    def names(self):
+        """Returns the names of all accounts with a known provider."""
+        return sorted(a.name for a in self._accounts.values() if a.provider)
+
+    def select(self, provider=None, domain=None, tags=()):
+        """Finds the accounts matching all of the given selectors.
+
+        Parameters:
+            provider: A provider name, or a domain handled by the provider.
+            domain: An account domain.
+            tags: A list of tags which the accounts must all have.
+
+        Returns a sorted list of account names.
+        """
+        sets = list()
+        if provider:
+            cls = get_provider(provider)
+            sets.append(self._by_provider.get(cls.name if cls else provider, set()))
+        if domain:
+            sets.append(self._by_domain.get(DomainIndex.normalize(domain), set()))
+        for tag in tags:
+            sets.append(self._by_tag.get(tag, set()))
+        if not sets:
+            return self.names()
+        sets.sort(key=len)
+        return sorted(set.intersection(*sets))
+
+    def __iter__(self):
+        return iter(self._accounts.values())
+
+    @classmethod
+    def from_records(cls, records):
+        """Creates an inventory from (name, options) pairs.
+
+        Providers are resolved for all of the accounts in one pass.
+        """
+        records = list(records)
+        providers = resolve_providers(options.get("domain") or name
+                for name, options in records)
+        return cls(Account(name, options, providers[options.get("domain") or name])
+                for name, options in records)
+
+    @classmethod
+    def from_config(cls, config):
+        """Creates an inventory from the sections of a ConfigParser."""
+        return cls.from_records((s, dict(config[s]))
+                for s in config.sections() if s != "pass-rotate")
+
+    @classmethod
+    def from_csv(cls, path):
+        """Loads an inventory from a CSV file.
+
+        The file must have a header row with a "name" column. Every other
+        column is an option, which is left out for rows where it is empty.
+        """
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+        return cls.from_records((row.pop("name"),
+                { k: v for k, v in row.items() if k and v }) for row in rows)
+
+
+class SqliteInventory:
+    """An inventory stored in an SQLite database.
+
+    Selectors are answered by indexed queries, without loading every account.
+    Use write_sqlite to create the database.
+    """
+    def __init__(self, path):
+        self._db = sqlite3.connect(path, check_same_thread=False)
+
+    def _account(self, row):
+        name, provider, options = row
+        options = json.loads(options)
+        cls = get_provider(provider) if provider else None
+        return Account(name, options, cls)
+
+    def get(self, name):
+        row = self._db.execute("SELECT name, provider, options FROM accounts "
+                "WHERE name = ?", (name,)).fetchone()
+        return self._account(row) if row else None
+
+    def __contains__(self, name):
+        return self._db.execute("SELECT 1 FROM accounts WHERE name = ?",
+                (name,)).fetchone() is not None
+
+    def names(self):
+        return [r[0] for r in self._db.execute("SELECT name FROM accounts "
+                "WHERE provider IS NOT NULL ORDER BY name")]
+
+    def select(self, provider=None, domain=None, tags=()):
+        query = "SELECT name FROM accounts WHERE provider IS NOT NULL"
+        params = list()
+        if provider:
+            cls = get_provider(provider)
+            query += " AND provider = ?"
+            params.append(cls.name if cls else provider)
+        if domain:
+            query += " AND domain = ?"
+            params.append(DomainIndex.normalize(domain))
+        for tag in tags:
+            query += " AND name IN (SELECT account FROM tags WHERE tag = ?)"
+            params.append(tag)
+        query += " ORDER BY name"
+        return [r[0] for r in self._db.execute(query, params)]
+
+    def __iter__(self):
+        for row in self._db.execute("SELECT name, provider, options FROM accounts "
+                "ORDER BY name"):
+            yield self._account(row)
+
+
+def write_sqlite(inventory, path):
+    """Writes the accounts of an inventory to a new SQLite database."""
+    if os.path.exists(path):
+        os.remove(path)
+    db = sqlite3.connect(path)
+    with db:
+        db.executescript("""
+            CREATE TABLE accounts (
+                name TEXT PRIMARY KEY,
+                domain TEXT NOT NULL,
+                provider TEXT,
+                options TEXT NOT NULL
+            );
+            CREATE INDEX accounts_domain ON accounts (domain);
+            CREATE INDEX accounts_provider ON accounts (provider);
+            CREATE TABLE tags (
+                account TEXT NOT NULL REFERENCES accounts (name),
+                tag TEXT NOT NULL,
+                PRIMARY KEY (tag, account)
+            );
+        """)
+        for account in inventory:
+            db.execute("INSERT INTO accounts VALUES (?, ?, ?, ?)", (
+                account.name,
+                DomainIndex.normalize(account.domain),
+                account.provider.name if account.provider else None,
+                json.dumps(account.options),
+            ))
+            db.executemany("INSERT INTO tags VALUES (?, ?)",
+                    [(account.name, tag) for tag in account.tags])
+    db.close()
+
+
+def write_csv(inventory, path):
+    """Writes the accounts of an inventory to a CSV file."""
+    accounts = list(inventory)
+    columns = sorted(set(k for a in accounts for k in a.options))
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name"] + columns)
+        for a in accounts:
+            writer.writerow([a.name] + [a.options.get(c, "") for c in columns])
+
+
+def open_inventory(path):
+    """Opens an inventory file, either an SQLite database or a CSV file."""
+    if path.endswith(".csv"):
+        return Inventory.from_csv(path)
+    return SqliteInventory(path)
+
+
+def write_inventory(inventory, path):
+    if path.endswith(".csv"):
+        write_csv(inventory, path)
+    else:
+        write_sqlite(inventory, path)
@@ -0,0 +1,122 @@
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import heapq
+import itertools
+
+
+class PlanError(Exception):
+    pass
+
+
+class RotationPlan:
+    """A set of accounts to rotate, ordered by their dependencies.
+
+    Dependencies are given as a dict mapping an account to the accounts which
+    must be rotated successfully before it, for example the email account
+    which receives its password reset mails. Dependencies on accounts which
+    are not part of the plan are ignored.
+    """
+    def __init__(self, accounts, depends=None):
+        self.accounts = list(dict.fromkeys(accounts))
+        selected = set(self.accounts)
+        depends = depends or dict()
+        self.prerequisites = {
+            a: [d for d in depends.get(a, []) if d in selected and d != a]
+            for a in self.accounts
+        }
+        self.dependents = { a: list() for a in self.accounts }
+        for a, prerequisites in self.prerequisites.items():
+            for d in prerequisites:
+                self.dependents[d].append(a)
+        self._check_cycles()
+
+    def _check_cycles(self):
+        remaining = { a: len(p) for a, p in self.prerequisites.items() }
+        ready = [a for a, n in remaining.items() if n == 0]
+        while ready:
+            a = ready.pop()
+            for d in self.dependents[a]:
+                remaining[d] -= 1
+                if remaining[d] == 0:
+                    ready.append(d)
+        cycle = sorted(a for a, n in remaining.items() if n > 0)
+        if cycle:
+            raise PlanError("Circular dependency between accounts: {}".format(
+                ", ".join(cycle)))
+
+    def run(self, rotate, jobs=1, on_skip=None, priority=None, failed=()):
+        """Rotates every account in the plan.
+
+        Accounts whose prerequisites have all succeeded are started as soon
+        as a worker is free, so that independent accounts run concurrently.
+        If an account fails, everything which depends on it is skipped.
+
+        Parameters:
+            rotate: A function which rotates the given account and returns
+                    True on success.
+            jobs: The maximum number of accounts to rotate at once.
+            on_skip: Called with (account, prerequisite) for each account
+                     which is skipped because the prerequisite did not
+                     succeed.
+            priority: A function which returns a sort key for an account.
+                      When more accounts are ready than there are free
+                      workers, those with the lowest key start first.
+                      Otherwise, they start in the order given.
+            failed: Accounts in the plan which are already known to have
+                    failed, for example because their configuration is
+                    invalid. They are not rotated, and their dependents are
+                    skipped.
+
+        Returns a dict mapping each account to True (rotated), False (failed)
+        or None (skipped).
+        """
+        results = dict()
+        waiting = { a: len(p) for a, p in self.prerequisites.items() }
+        order = itertools.count()
+        ready = list()
+        running = dict()
+
+        def push(account):
+            key = priority(account) if priority else ()
+            heapq.heappush(ready, (key, next(order), account))
+
+        def skip(account, prerequisite):
+            if account in results:
+                return
+            results[account] = None
+            if on_skip:
+                on_skip(account, prerequisite)
+            for d in self.dependents[account]:
+                skip(d, account)
+
+        for a in failed:
+            results[a] = False
+        for a in failed:
+            for d in self.dependents[a]:
+                skip(d, a)
+
+        for a in self.accounts:
+            if waiting[a] == 0 and a not in results:
+                push(a)
+
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            while ready or running:
+                while ready and len(running) < jobs:
+                    account = heapq.heappop(ready)[2]
+                    running[executor.submit(rotate, account)] = account
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    account = running.pop(future)
+                    try:
+                        results[account] = bool(future.result())
+                    except Exception:
+                        results[account] = False
+                    for d in self.dependents[account]:
+                        if d in results:
+                            continue
+                        if not results[account]:
+                            skip(d, account)
+                            continue
+                        waiting[d] -= 1
+                        if waiting[d] == 0:
+                            push(d)
+        return results
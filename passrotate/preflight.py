@@ -0,0 +1,115 @@
+from passrotate.state import parse_age
+from passrotate.totp import decode_secret
+import shlex
+import shutil
+
+# Shell builtins which are not found on the PATH
+_builtins = { ":", ".", "[", "cd", "echo", "eval", "exec", "export", "printf",
+        "read", "source", "test", "true", "false" }
+
+_numbers = ["timeout", "deadline", "totp-skew"]
+
+
+def _count(minimum):
+    def parse(value):
+        if int(value) < minimum:
+            raise ValueError(value)
+    return parse
+
+_settings = {
+    "timeout": (float, "a number of seconds"),
+    "account-deadline": (float, "a number of seconds"),
+    "run-deadline": (float, "a number of seconds"),
+    "totp-skew": (float, "a number of seconds"),
+    "max-rss": (float, "a number of megabytes"),
+    "jobs": (_count(1), "a whole number of at least 1"),
+    "parse-workers": (_count(0), "a whole number"),
+    "circuit-threshold": (_count(0), "a whole number"),
+}
+
+
+def check_command(command):
+    """Checks that a shell command is set and its program can be found.
+
+    Only the first word of the command is looked up, so this catches typos
+    and missing password managers but not every broken pipeline.
+
+    Returns a list of problems, which is empty if none were found.
+    """
+    if not command or not command.strip():
+        return ["not set"]
+    try:
+        words = shlex.split(command)
+    except ValueError as ex:
+        return ["cannot be parsed: {}".format(ex)]
+    # Skip leading environment assignments like FOO=bar
+    words = [w for w in words if "=" not in w.split("/")[0]] or words
+    program = words[0]
+    if program in _builtins or shutil.which(program):
+        return []
+    return ["{} was not found".format(program)]
+
+
+def check_settings(settings):
+    """Checks the values of the [pass-rotate] section.
+
+    Parameters:
+        settings: A mapping of setting names to values, with any command line
+                  overrides already applied.
+
+    Returns a list of problems, which is empty if none were found.
+    """
+    problems = list()
+    for key, value in settings.items():
+        if not value:
+            continue
+        if key == "max-age" or key.startswith("max-age."):
+            try:
+                parse_age(value)
+            except ValueError:
+                problems.append("{}= must be a number of days, or suffixed with h, d or w"
+                        .format(key))
+        elif key in _settings:
+            parse, description = _settings[key]
+            try:
+                parse(value)
+            except ValueError:
+                problems.append("{}= must be {}".format(key, description))
+    return problems
+
+
+def check_account(account):
+    """Checks an account's configuration before any network requests.
+
+    Parameters:
+        account: A passrotate.inventory.Account.
+
+    Returns a list of problems, which is empty if none were found.
+    """
+    if not account.provider:
+        return ["no service provider for {}".format(account.domain)]
+    options = account.options
+    problems = account.provider.check_options(options)
+    for key in _numbers:
+        try:
+            float(options.get(key) or 0)
+        except ValueError:
+            problems.append("{}= must be a number of seconds".format(key))
+    try:
+        length = int(options.get("password-length") or 0)
+    except ValueError:
+        problems.append("password-length= must be a whole number")
+    else:
+        problem = length and account.provider.password_policy.check_length(length)
+        if problem:
+            problems.append("password-length= {}".format(problem))
+    try:
+        parse_age(options.get("max-age"))
+    except ValueError:
+        problems.append("max-age= must be a number of days, or suffixed with h, d or w")
+    if options.get("totp-secret"):
+        try:
+            decode_secret(options.get("totp-secret"))
+        except Exception:
+            problems.append("totp-secret= is not a valid base32 secret or otpauth:// URI")
+    return problems
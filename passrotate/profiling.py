@@ -0,0 +1,132 @@
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import tracemalloc
+
+
+def current_rss():
+    """Returns the resident set size of this process in bytes.
+
+    This is read from /proc where available, and otherwise falls back to the
+    peak resident set size. Returns None if neither is available.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Profiler:
+    """Collects CPU and memory profiles of provider flows.
+
+    Each call made through the profiler is run under cProfile and bracketed
+    by tracemalloc snapshots. CPU statistics are merged per provider, and
+    allocations are attributed to the source line which made them.
+
+    tracemalloc is process-wide, so calls are run one at a time, even when
+    they are made from several threads. Otherwise each call's allocations and
+    peak would include whatever the other threads did meanwhile.
+    """
+    def __init__(self, directory, limit=15):
+        self.directory = directory
+        self.limit = limit
+        self._stats = dict()
+        self._allocations = dict()
+        self._peaks = dict()
+        self._lock = threading.Lock()
+        self._call_lock = threading.Lock()
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        tracemalloc.start()
+
+    def call(self, name, func, *args, **kwargs):
+        """Runs func(*args, **kwargs) while profiling it.
+
+        Parameters:
+            name: The provider name to attribute this call to.
+            func: The function to call.
+
+        Returns the result of func.
+        """
+        with self._call_lock:
+            profile = cProfile.Profile()
+            before = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+            # The peak counts everything still traced, so measure from here
+            start, _ = tracemalloc.get_traced_memory()
+            try:
+                return profile.runcall(func, *args, **kwargs)
+            finally:
+                _, peak = tracemalloc.get_traced_memory()
+                after = tracemalloc.take_snapshot()
+                self._collect(name, profile, before, after, peak - start)
+
+    def _collect(self, name, profile, before, after, peak):
+        # Leave out the profiler's own bookkeeping
+        ignore = [tracemalloc.Filter(False, module.__file__)
+                for module in (tracemalloc, cProfile, pstats, sys.modules[__name__])]
+        diff = after.filter_traces(ignore).compare_to(
+                before.filter_traces(ignore), "lineno")
+        with self._lock:
+            if name in self._stats:
+                self._stats[name].add(profile)
+            else:
+                self._stats[name] = pstats.Stats(profile)
+            for stat in diff:
+                if stat.size_diff <= 0:
+                    continue
+                site = str(stat.traceback[0])
+                self._allocations[site] = \
+                    self._allocations.get(site, 0) + stat.size_diff
+            self._peaks[name] = max(self._peaks.get(name, 0), peak)
+
+    def stop(self):
+        """Writes the collected profiles and returns a summary table.
+
+        A <provider>.prof file is written to the profile directory for each
+        provider, which may be loaded with pstats or a profile viewer, along
+        with summary.txt, a copy of the returned summary.
+        """
+        tracemalloc.stop()
+        if not self._stats:
+            return ""
+        combined = None
+        for name, stats in self._stats.items():
+            filename = re.sub(r"[^\w.-]+", "_", name) + ".prof"
+            stats.dump_stats(os.path.join(self.directory, filename))
+            if combined is None:
+                combined = pstats.Stats(os.path.join(self.directory, filename))
+            else:
+                combined.add(os.path.join(self.directory, filename))
+
+        out = io.StringIO()
+        out.write("Peak traced memory used per call, by provider:\n\n")
+        for name, peak in sorted(self._peaks.items(), key=lambda p: -p[1]):
+            out.write("  {:<24} {:>10.1f} KiB\n".format(name, peak / 1024))
+
+        out.write("\nTop {} functions by internal time:\n".format(self.limit))
+        combined.stream = out
+        combined.sort_stats("tottime").print_stats(self.limit)
+
+        out.write("Top {} allocation sites:\n\n".format(self.limit))
+        sites = sorted(self._allocations.items(), key=lambda s: -s[1])
+        for site, size in sites[:self.limit]:
+            out.write("  {:>10.1f} KiB  {}\n".format(size / 1024, site))
+
+        summary = out.getvalue()
+        with open(os.path.join(self.directory, "summary.txt"), "w") as f:
+            f.write(summary)
+        return summary
@@ -1,17 +1,88 @@
 from enum import Enum
+from passrotate.session import Session
+import secrets
+import string
+
+class _DomainNode:
+    __slots__ = ["children", "exact", "wildcard"]
+
+    def __init__(self):
+        self.children = dict()
+        self.exact = None
+        self.wildcard = None
+
+class DomainIndex:
+    """Maps domains to values by longest matching suffix.
+
+    Domains are stored in a trie keyed by their labels in reverse, so that
+    "en.wikipedia.org" is found by walking "org", "wikipedia", "en". A plain
+    domain like "wikipedia.org" matches itself and all of its subdomains, and
+    a wildcard like "*.wikipedia.org" matches only its subdomains. The most
+    specific match wins.
+    """
+    def __init__(self):
+        self._root = _DomainNode()
+
+    @staticmethod
+    def normalize(domain):
+        domain = domain.strip().lower()
+        if "://" in domain:
+            domain = domain.split("://", 1)[1]
+        domain = domain.split("/", 1)[0].rsplit("@", 1)[-1]
+        if not domain.startswith("["):
+            domain = domain.split(":", 1)[0]
+        return domain.rstrip(".")
+
+    def add(self, domain, value):
+        labels = self.normalize(domain).split(".")
+        wildcard = labels[0] == "*"
+        if wildcard:
+            labels = labels[1:]
+        node = self._root
+        for label in reversed(labels):
+            node = node.children.setdefault(label, _DomainNode())
+        if wildcard:
+            node.wildcard = value
+        else:
+            node.exact = value
+
+    def lookup(self, domain):
+        labels = self.normalize(domain).split(".")
+        node = self._root
+        match = None
+        for i in range(len(labels) - 1, -1, -1):
+            node = node.children.get(labels[i])
+            if node is None:
+                break
+            if i == 0:
+                match = node.exact or match
+            else:
+                match = node.wildcard or node.exact or match
+        return match
 
 _providers = list()
 _provider_map = dict()
-_provider_domains = dict()
+_provider_domains = DomainIndex()
 
 def register_provider(provider):
     _providers.append(provider)
     _provider_map[provider.name] = provider
     for d in provider.domains:
-        _provider_domains[d] = provider
+        _provider_domains.add(d, provider)
 
 def get_provider(domain):
-    return _provider_map.get(domain) or _provider_domains.get(domain)
+    return _provider_map.get(domain) or _provider_domains.lookup(domain)
+
+def resolve_providers(domains):
+    """Finds the provider for each of many domains or provider names.
+
+    Returns a dict mapping each domain to its provider class, or None.
+    """
+    resolved = dict()
+    for domain in domains:
+        if domain not in resolved:
+            resolved[domain] = get_provider(domain)
+    return resolved
 
 def get_providers():
     return _providers
@@ -21,12 +92,161 @@ class PromptType(Enum):
     totp = "totp"
     sms = "sms"
 
+_booleans = {
+    "1": True, "yes": True, "true": True, "on": True,
+    "0": False, "no": False, "false": False, "off": False,
+}
+
+def parse_bool(value, default=False):
+    """Parses a yes/no option value, accepting the same words as ConfigParser."""
+    if value is None or value == "":
+        return default
+    try:
+        return _booleans[str(value).strip().lower()]
+    except KeyError:
+        raise ValueError("Not a boolean: {}".format(value))
+
 class ProviderOption:
     def __init__(self, type, doc, optional=False):
         self.type = type
         self.doc = doc
         self.optional = optional
 
+    def check(self, value):
+        """Returns what is wrong with a value for this option, or None."""
+        if isinstance(self.type, dict):
+            if value not in self.type.values():
+                return "must be one of {}".format(", ".join(self.type.values()))
+        elif self.type is bool:
+            if str(value).strip().lower() not in _booleans:
+                return "must be yes or no"
+        elif self.type is not str:
+            try:
+                self.type(value)
+            except ValueError:
+                return "must be a valid {}".format(self.type.__name__)
+        return None
+
+class PasswordPolicy:
+    def __init__(self, length=32, lowercase=True, uppercase=True, digits=True,
+            symbols=string.punctuation, min_length=None, max_length=None):
+        self.length = length
+        self.min_length = min_length
+        self.max_length = max_length
+        self.lowercase = lowercase
+        self.uppercase = uppercase
+        self.digits = digits
+        self.symbols = symbols
+
+    def classes(self):
+        classes = list()
+        if self.lowercase:
+            classes.append(string.ascii_lowercase)
+        if self.uppercase:
+            classes.append(string.ascii_uppercase)
+        if self.digits:
+            classes.append(string.digits)
+        if self.symbols:
+            classes.append(self.symbols)
+        return classes
+
+    def check_length(self, length):
+        """Checks a password length against this policy's limits.
+
+        Passwords must also be long enough to hold one character from each
+        enabled character class.
+
+        Returns a problem, or None if the length is allowed.
+        """
+        minimum = max(self.min_length or 0, len(self.classes()))
+        if length < minimum:
+            return "must be at least {}".format(minimum)
+        if self.max_length and length > self.max_length:
+            return "must be at most {}".format(self.max_length)
+        return None
+
+    def generate(self, length=None):
+        """Generates a random password which satisfies this policy.
+
+        The password contains at least one character from each enabled
+        character class. Raises ValueError if length is outside of the
+        policy's limits.
+        """
+        length = length or self.length
+        problem = self.check_length(length)
+        if problem:
+            raise ValueError("Password length {}".format(problem))
+        classes = self.classes()
+        alphabet = "".join(classes)
+        password = [secrets.choice(c) for c in classes]
+        password += [secrets.choice(alphabet) for _ in range(length - len(classes))]
+        secrets.SystemRandom().shuffle(password)
+        return "".join(password)
+
+    def __str__(self):
+        names = [
+            n for n, enabled in [
+                ("lowercase", self.lowercase),
+                ("uppercase", self.uppercase),
+                ("digits", self.digits),
+                ("symbols", self.symbols),
+            ] if enabled
+        ]
+        limits = ""
+        if self.min_length and self.max_length:
+            limits = ", {} to {} allowed".format(self.min_length, self.max_length)
+        elif self.min_length:
+            limits = ", at least {} allowed".format(self.min_length)
+        elif self.max_length:
+            limits = ", at most {} allowed".format(self.max_length)
+        return "{} characters ({}){}".format(self.length, ", ".join(names), limits)
+
+# Set on each provider instance by PassRotate.get_provider
+_provider_settings = ("_prompt", "_timeout", "_deadline", "_url_map", "_tracer")
+
 class Provider:
+    password_policy = PasswordPolicy()
+    _timeout = None
+    _deadline = None
+    _url_map = None
+    _tracer = None
+
     def prompt(self, prompt, prompt_type):
         return self._prompt(prompt, prompt_type)
+
+    @classmethod
+    def check_options(cls, options):
+        """Checks an account's options against the provider's options.
+
+        Returns a list of problems, which is empty if the options are valid.
+        """
+        problems = list()
+        for key, option in getattr(cls, "options", dict()).items():
+            value = options.get(key)
+            if not value:
+                if not option.optional:
+                    problems.append("missing {}= ({})".format(key, option.doc))
+                continue
+            problem = option.check(value)
+            if problem:
+                problems.append("{}= {}".format(key, problem))
+        return problems
+
+    def new_session(self):
+        return Session(timeout=self._timeout, deadline=self._deadline,
+                url_map=self._url_map, tracer=self._tracer)
+
+    def close(self):
+        """Releases the session and everything kept between prepare and execute.
+
+        Providers keep their session, forms and any user data they fetched on
+        the instance. This closes the session's connections and drops those
+        attributes, so that they can be freed even while the provider is still
+        referenced. The provider cannot be used afterwards.
+        """
+        session = self.__dict__.get("_session")
+        if session is not None:
+            session.close()
+        for key in [k for k in self.__dict__ if k.startswith("_")
+                and k not in _provider_settings]:
+            del self.__dict__[key]
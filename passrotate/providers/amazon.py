@@ -2,7 +2,6 @@ from passrotate.provider import Provider, ProviderOption, register_provider
 from passrotate.forms import get_form
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse, urlencode
-import requests
 
 
 class Amazon(Provider):
@@ -13,7 +12,6 @@ class Amazon(Provider):
     name = "Amazon"
     domains = [
         "amazon.com",
-        "www.amazon.com"
     ]
     options = {
         "email": ProviderOption(str, "Your Amazon email account")
@@ -23,7 +21,7 @@ class Amazon(Provider):
         self._email = options["email"]
 
     def prepare(self, old_password):
-        self._session = requests.Session()
+        self._session = self.new_session()
         r = self._session.get("https://www.amazon.com/ap/signin?openid.assoc_handle=usflex&openid.claimed_id=http%3A%2F%2Fspecs.openid.net%2Fauth%2F2.0%2Fidentifier_select&openid.identity=http%3A%2F%2Fspecs.openid.net%2Fauth%2F2.0%2Fidentifier_select&openid.mode=checkid_setup&openid.ns=http%3A%2F%2Fspecs.openid.net%2Fauth%2F2.0")
         form = get_form(r.text, name="signIn")
         form.update({
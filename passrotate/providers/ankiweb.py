@@ -1,6 +1,5 @@
 from passrotate.provider import Provider, ProviderOption, register_provider
 from passrotate.forms import get_form
-import requests
 
 
 class AnkiWeb(Provider):
@@ -20,7 +19,7 @@ class AnkiWeb(Provider):
         self.username = options["username"]
 
     def prepare(self, old_password):
-        self._session = requests.Session()
+        self._session = self.new_session()
         r = self._session.get("https://ankiweb.net/account/login")
         self._form = get_form(r.text, id="form")
         self._form.update({
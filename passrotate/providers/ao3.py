@@ -1,6 +1,5 @@
-from passrotate.provider import Provider, ProviderOption, register_provider
+from passrotate.provider import Provider, ProviderOption, PasswordPolicy, register_provider
 from passrotate.forms import get_form
-import requests
 
 class Ao3(Provider):
     """
@@ -14,12 +13,14 @@ class Ao3(Provider):
     options = {
         "login": ProviderOption(str, "Your email or username")
     }
+    # AO3 rejects passwords longer than 40 characters
+    password_policy = PasswordPolicy(length=40, max_length=40)
 
     def __init__(self, options):
         self.login = options["login"]
 
     def prepare(self, old_password):
-        self._session = requests.Session()
+        self._session = self.new_session()
 
         ###authenticate
         r = self._session.get("https://archiveofourown.org/users/login")
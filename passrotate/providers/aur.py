@@ -1,6 +1,5 @@
 from passrotate.provider import Provider, ProviderOption, register_provider
 from passrotate.forms import get_form
-import requests
 
 class ArchUserRepository(Provider):
     """
@@ -26,7 +25,7 @@ class ArchUserRepository(Provider):
         return r
 
     def prepare(self, old_password):
-        self._session = requests.Session()
+        self._session = self.new_session()
         self._login(old_password)
         password_change_url = "https://aur.archlinux.org/account/" + self.username + "/edit"
         r = self._session.get(password_change_url)
@@ -1,36 +1,34 @@
-from passrotate.provider import Provider, ProviderOption, register_provider
-from passrotate.forms import get_form
+from passrotate.provider import Provider, ProviderOption, register_provider, parse_bool
+from passrotate.forms import get_assigned_json
 from urllib.parse import urlparse
-from bs4 import BeautifulSoup
-import requests
-import json
 
 def get_bootstrap(html):
-    soup = BeautifulSoup(html, "html.parser")
-    script = [s.text for s in soup.find_all("script") if s.text.startswith("window.bootstrap")][0]
-    return json.loads(script[len("window.boostrap = "):-1])
+    return get_assigned_json(html, ["window.bootstrap"])["window.bootstrap"]
 
 class Cloudflare(Provider):
     """
     [cloudflare.com]
     email=Your Cloudflare email address
+    api-first=Optional, set to no to always scrape the account page
     """
     name = "Cloudflare"
     domains = [
         "cloudflare.com",
-        "www.cloudflare.com"
     ]
     options = {
-        "email": ProviderOption(str, "Your Cloudflare email address")
+        "email": ProviderOption(str, "Your Cloudflare email address"),
+        "api-first": ProviderOption(bool, "Skip scraping pages where a cheaper route exists (default: yes)",
+                optional=True),
     }
 
     def __init__(self, options):
         self.email = options["email"]
+        self.api_first = parse_bool(options.get("api-first"), True)
 
     def prepare(self, old_password):
-        self._session = requests.Session()
+        self._session = self.new_session()
         r = self._session.get("https://www.cloudflare.com/a/login")
-        bs = get_bootstrap(r.text)
+        bs = get_bootstrap(r.content)
         form = {
             "email": self.email,
             "password": old_password,
@@ -40,9 +38,15 @@ class Cloudflare(Provider):
         url = urlparse(r.url)
         if url.path != "/a/overview":
             raise Exception("Failed to log into Cloudflare with current password")
-        r = self._session.get("https://www.cloudflare.com/a/account/my-account")
-        bs = get_bootstrap(r.text)
-        self._atok = bs["atok"]
+        # The overview page is bootstrapped with the same API token
+        self._atok = None
+        if self.api_first:
+            bs = get_assigned_json(r.content, ["window.bootstrap"]).get("window.bootstrap")
+            self._atok = (bs or dict()).get("atok")
+        if not self._atok:
+            r = self._session.get("https://www.cloudflare.com/a/account/my-account")
+            bs = get_bootstrap(r.content)
+            self._atok = bs["atok"]
 
     def execute(self, old_password, new_password):
         r = self._session.put("https://www.cloudflare.com/api/v4/user/password", json={
@@ -1,28 +1,30 @@
-from passrotate.provider import Provider, ProviderOption, register_provider
-from passrotate.forms import get_form
+from passrotate.provider import Provider, ProviderOption, register_provider, parse_bool
+from passrotate.forms import get_form, get_assigned_json, get_meta_content
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse
-import json
-import requests
 
 class DigitalOcean(Provider):
     """
     [digitalocean.com]
     email=Your Digital Ocean email address
+    api-first=Optional, set to no to always scrape the profile page
     """
     name = "Digital Ocean"
     domains = [
         "digitalocean.com",
     ]
     options = {
-        "email": ProviderOption(str, "Your Digital Ocean email address")
+        "email": ProviderOption(str, "Your Digital Ocean email address"),
+        "api-first": ProviderOption(bool, "Skip scraping pages where a cheaper route exists (default: yes)",
+                optional=True),
     }
 
     def __init__(self, options):
         self.email = options["email"]
+        self.api_first = parse_bool(options.get("api-first"), True)
 
     def prepare(self, old_password):
-        self._session = requests.Session()
+        self._session = self.new_session()
         r = self._session.get("https://cloud.digitalocean.com/login")
         form = get_form(r.text, id="new_user")
         form.update({
@@ -33,19 +35,18 @@ class DigitalOcean(Provider):
         url = urlparse(r.url)
         if url.path != "/droplets":
             raise Exception("Unable to log into Digital Ocean with current password")
-        soup = BeautifulSoup(r.text, "html.parser")
-        for script in soup.find_all("script"):
-            text = script.text.strip()
-            if text.startswith("window.currentUser = "):
-                j = json.loads(text[:text.index("\n")][len("window.currentUser = "):])
-                self._user_id = j.get("uuid")
-                break
+        user = get_assigned_json(r.content, ["window.currentUser"])
+        self._user_id = (user.get("window.currentUser") or dict()).get("uuid")
         if not self._user_id:
             raise Exception("Unable to extract user ID")
-        r = self._session.get("https://cloud.digitalocean.com/settings/profile?i=" +
-                self._user_id[:6])
-        soup = BeautifulSoup(r.text, "html.parser")
-        self._csrf_token = soup.find("meta", attrs={ "name": "csrf-token" }).get("content", "")
+        # The droplets page carries the same CSRF token as the profile page
+        self._csrf_token = get_meta_content(r.content, "csrf-token") \
+                if self.api_first else None
+        if not self._csrf_token:
+            r = self._session.get("https://cloud.digitalocean.com/settings/profile?i=" +
+                    self._user_id[:6])
+            soup = BeautifulSoup(r.text, "html.parser")
+            self._csrf_token = soup.find("meta", attrs={ "name": "csrf-token" }).get("content", "")
         self._user = self._session.get("https://cloud.digitalocean.com/api/v1/users/" +
                 self._user_id).json()
 
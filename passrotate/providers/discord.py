@@ -1,5 +1,4 @@
 from passrotate.provider import Provider, ProviderOption, PromptType, register_provider
-import requests
 
 class Discord(Provider):
     """
@@ -23,7 +22,7 @@ class Discord(Provider):
             "password": old_password
         }
 
-        self._session = requests.Session()
+        self._session = self.new_session()
         r = self._session.post("https://discordapp.com/api/v6/auth/login",
                 json=data)
 
@@ -1,6 +1,5 @@
 from passrotate.provider import Provider, ProviderOption, register_provider
 from passrotate.forms import get_form
-import requests
 
 class Facebook(Provider):
     """
@@ -19,7 +18,7 @@ class Facebook(Provider):
         self.username = options["username"]
 
     def prepare(self, old_password):
-        self._session = requests.Session()
+        self._session = self.new_session()
 
         ###authenticate
         r = self._session.get("https://m.facebook.com/login.php")
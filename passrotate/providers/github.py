@@ -1,7 +1,6 @@
 from passrotate.provider import Provider, ProviderOption, PromptType, register_provider
 from passrotate.forms import get_form
 from urllib.parse import urlparse
-import requests
 
 class GitHub(Provider):
     """
@@ -20,7 +19,7 @@ class GitHub(Provider):
         self.username = options["username"]
 
     def prepare(self, old_password):
-        self._session = requests.Session()
+        self._session = self.new_session()
         r = self._session.get("https://github.com/login")
         form = get_form(r.text)
         form.update({
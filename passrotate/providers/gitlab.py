@@ -1,44 +1,77 @@
 import json
+import re
+import threading
 
-from passrotate.provider import Provider, ProviderOption, PromptType, register_provider
-from passrotate.forms import get_form
+from passrotate.provider import Provider, ProviderOption, PromptType, register_provider, parse_bool
+from passrotate.forms import get_form, get_meta_content
 from urllib.parse import urlparse
-import requests
 from bs4 import BeautifulSoup
 
+_otp_input = re.compile(r"""<input\b[^>]*\bid=["']?user_otp_attempt\b""")
+
 class GitLab(Provider):
     """
     [gitlab.com]
     username=Your GitLab username
+    api-first=Optional, set to no to always scrape the password page
+    url=Optional, the address of a self-hosted GitLab instance
+    admin-token=Optional, an administrator's personal access token
+    admin-token-pass-name=Optional, read admin-token with get-password instead
+    user-id=Optional, your numeric user ID, for use with admin-token
+
+    For a self-hosted instance, set domain=gitlab.com and url= to its address.
+
+    With admin-token, the password is set through the admin API instead of
+    signing in as the user, so the current password and two-factor codes are
+    not needed. Accounts which share an instance and token also share one
+    authenticated session.
     """
     name = "GitLab"
     domains = [
         "gitlab.com",
     ]
     options = {
-        "username": ProviderOption(str, "Your GitLab username")
+        "username": ProviderOption(str, "Your GitLab username"),
+        "api-first": ProviderOption(bool, "Skip scraping pages where a cheaper route exists (default: yes)",
+                optional=True),
+        "url": ProviderOption(str, "Address of a self-hosted instance (default: https://gitlab.com)",
+                optional=True),
+        "admin-token": ProviderOption(str, "Administrator's personal access token",
+                optional=True),
+        "user-id": ProviderOption(int, "Your numeric user ID, for use with admin-token",
+                optional=True),
     }
 
+    # Sessions for admin-token mode, shared by accounts on the same instance
+    _admin_sessions = dict()
+    _admin_lock = threading.Lock()
+
     def __init__(self, options):
         self.username = options["username"]
+        self.api_first = parse_bool(options.get("api-first"), True)
+        self.url = (options.get("url") or "https://gitlab.com").rstrip("/")
+        self.admin_token = options.get("admin-token")
+        self.user_id = int(options["user-id"]) if options.get("user-id") else None
 
     def _read_userid(self):
         try:
-            r = self._session.get("https://gitlab.com/api/v4/user")
+            r = self._session.get(self.url + "/api/v4/user")
             self.user_id = json.loads(r.text)["id"]
         except:
             raise Exception("Can't read user id from API")
 
 
-    def _handle_two_factor_auth(self, r):
+    def _has_two_factor_auth(self, r):
+        if self.api_first:
+            return _otp_input.search(r.text) is not None
         soup = BeautifulSoup(r.text, "html5lib")
+        return soup.find("input", attrs={ 'id': 'user_otp_attempt' }) is not None
 
+    def _handle_two_factor_auth(self, r):
         # look for the OTP input field
-        otp_input = soup.find("input", attrs={ 'id': 'user_otp_attempt' })
-
         # if we didn't find it its probably not enabled, great!
-        if otp_input is None:
-            return
+        if not self._has_two_factor_auth(r):
+            return r
 
         # else we ask the user to provide its token and send it
         code = self.prompt("Enter your two factor (TOTP) code", PromptType.totp)
@@ -46,43 +79,108 @@ class GitLab(Provider):
         form.update({
             "user[otp_attempt]": code
         })
-        r = self._session.post("https://gitlab.com/users/sign_in", data=form)
+        r = self._session.post(self.url + "/users/sign_in", data=form)
         if r.status_code != 200:
             raise Exception("Unable to login via OTP")
+        return r
 
 
     def _login(self, old_password):
-        r = self._session.get("https://gitlab.com/users/sign_in")
+        r = self._session.get(self.url + "/users/sign_in")
         form = get_form(r.text)
         form.update({
             "user[login]": self.username,
             "user[password]": old_password
         })
-        r = self._session.post("https://gitlab.com/users/sign_in", data=form)
+        r = self._session.post(self.url + "/users/sign_in", data=form)
         if r.status_code != 200:
             raise Exception("Unable to log into GitLab account with current password")
 
         return r
 
+    def _signed_in(self, r):
+        # GitLab answers a wrong password or code by rendering the sign in
+        # page again, with a 200 status
+        return not urlparse(r.url).path.endswith("/users/sign_in")
+
+    def _set_form_from_page(self, r):
+        # The password form holds nothing but the CSRF token, which every
+        # page carries in a meta tag once signed in
+        token = get_meta_content(r.content, "csrf-token")
+        if not token:
+            return False
+        self._form = {
+            "utf8": "✓",
+            "_method": "put",
+            "authenticity_token": token,
+        }
+        return True
+
     def _set_form(self):
-        r = self._session.get("https://gitlab.com/profile/password/edit")
+        r = self._session.get(self.url + "/profile/password/edit")
         self._form = get_form(r.text, id="edit_user_{}".format(self.user_id))
 
+    def _admin_session(self):
+        key = (self.url, self.admin_token)
+        with GitLab._admin_lock:
+            session = GitLab._admin_sessions.get(key)
+            if session is None:
+                # Shared by every account, so the timeout and deadline are
+                # given per request. The URL map and tracer are the same for
+                # every account.
+                session = self.new_session()
+                session.timeout = None
+                session.deadline = None
+                session.headers["Private-Token"] = self.admin_token
+                GitLab._admin_sessions[key] = session
+        return session
+
+    def _prepare_admin(self):
+        self._api = self._admin_session()
+        if self.user_id is not None:
+            return
+        r = self._api.get(self.url + "/api/v4/users",
+                params={ "username": self.username },
+                timeout=self._timeout, deadline=self._deadline)
+        users = r.json() if r.status_code == 200 else None
+        if not users:
+            raise Exception("Unable to find GitLab user {} with the admin token".format(
+                self.username))
+        self.user_id = users[0]["id"]
+
     def prepare(self, old_password):
-        self._session = requests.Session()
+        if self.admin_token:
+            self._prepare_admin()
+            return
+        self._session = self.new_session()
 
         r = self._login(old_password)
-        self._handle_two_factor_auth(r)
-        self._read_userid()
+        r = self._handle_two_factor_auth(r)
+        if not self._signed_in(r):
+            raise Exception("Unable to log into GitLab account with current password")
+        if self.api_first and self._set_form_from_page(r):
+            return
+        if self.user_id is None:
+            self._read_userid()
         self._set_form()
 
 
     def execute(self, old_password, new_password):
+        if self.admin_token:
+            r = self._api.put(self.url + "/api/v4/users/{}".format(self.user_id),
+                    json={ "password": new_password },
+                    timeout=self._timeout, deadline=self._deadline)
+            if r.status_code != 200:
+                raise Exception("Failed to update GitLab password through the admin API")
+            return
         self._form.update({
             "user[current_password]": old_password,
             "user[password]": new_password,
             "user[password_confirmation]": new_password,
         })
-        r = self._session.post("https://gitlab.com/profile/password", data=self._form)
+        r = self._session.post(self.url + "/profile/password", data=self._form)
+        # A changed password signs you out, otherwise the form is shown again
+        if r.status_code != 200 or self._signed_in(r):
+            raise Exception("Failed to update GitLab password")
 
 register_provider(GitLab)
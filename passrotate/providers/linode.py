@@ -2,7 +2,6 @@ from passrotate.provider import Provider, ProviderOption, PromptType, register_p
 from passrotate.forms import get_form, get_form_data
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse
-import requests
 
 class Linode(Provider):
     """
@@ -22,7 +21,7 @@ class Linode(Provider):
             "3 months": "3",
             "6 months": "6",
             "12 months": "12",
-        }, "Password expiry")
+        }, "Password expiry", optional=True)
     }
 
     def __init__(self, options):
@@ -30,7 +29,7 @@ class Linode(Provider):
         self.expiry = options.get("expires") or "0"
 
     def prepare(self, old_password):
-        self._session = requests.Session()
+        self._session = self.new_session()
         r = self._session.get("https://manager.linode.com")
         form = get_form(r.text, id="CFForm_1")
         form.update({
@@ -3,7 +3,6 @@ from passrotate.forms import get_form
 from urllib.parse import urlparse
 from bs4 import BeautifulSoup
 import base64
-import requests
 
 class Namecheap(Provider):
     """
@@ -23,7 +22,7 @@ class Namecheap(Provider):
 
     def prepare(self, old_password):
         # what the hell is wrong with you Namecheap
-        self._session = requests.Session()
+        self._session = self.new_session()
         r = self._session.get("https://www.namecheap.com/myaccount/login.aspx")
         form = get_form(r.text, type="body")
         form.update({
@@ -1,6 +1,6 @@
 from passrotate.provider import Provider, ProviderOption, register_provider
 from passrotate.forms import get_form
-import requests
+from passrotate.formcache import get_cached_form
 from urllib.parse import urlparse
 
 class Pixiv(Provider):
@@ -11,8 +11,6 @@ class Pixiv(Provider):
     name = "pixiv"
     domains = [
         "pixiv.net",
-        "www.pixiv.net",
-        "touch.pixiv.net"
     ]
     options = {
         "username": ProviderOption(str, "Your pixiv username")
@@ -22,9 +20,10 @@ class Pixiv(Provider):
         self.username = options["username"]
 
     def prepare(self, old_password):
-        self._session = requests.Session()
-        r = self._session.get("https://accounts.pixiv.net/login")
-        self._form = get_form(r.text, action="/login")
+        self._session = self.new_session()
+        self._form = get_cached_form(self.name + ".login",
+                lambda: self._session.get("https://accounts.pixiv.net/login").text,
+                action="/login")
         self._form.update({
             "pixiv_id": self.username,
             "password": old_password
@@ -1,6 +1,10 @@
 from passrotate.provider import Provider, ProviderOption, register_provider
-from passrotate.forms import get_form, custom_get_form
-import requests
+from passrotate.forms import custom_get_form
+from passrotate.formcache import get_cached_form
+
+
+def _user_form_inputs(soup):
+    return soup.find(id="content").find("form").find_all("input")
 
 
 class PyPI(Provider):
@@ -20,9 +24,10 @@ class PyPI(Provider):
         self.username = options["username"]
 
     def prepare(self, old_password):
-        self._session = requests.Session()
-        r = self._session.get("https://pypi.python.org/pypi?%3Aaction=login_form")
-        self._form = get_form(r.text, type="div", id="content")
+        self._session = self.new_session()
+        self._form = get_cached_form(self.name + ".login",
+                lambda: self._session.get("https://pypi.python.org/pypi?%3Aaction=login_form").text,
+                type="div", id="content")
         self._form.update({
             "username": self.username,
             "password": old_password
@@ -32,10 +37,7 @@ class PyPI(Provider):
         if not r.ok:
             raise Exception("Unable to log into PyPI with current password")
         r = self._session.get("https://pypi.python.org/pypi?%3Aaction=user_form")
-        self._form = custom_get_form(
-            r.text,
-            lambda x: x.find(id="content").find("form").find_all("input")
-        )
+        self._form = custom_get_form(r.text, _user_form_inputs)
 
     def execute(self, old_password, new_password):
         self._form.update({
@@ -1,6 +1,5 @@
 from passrotate.provider import Provider, ProviderOption, PromptType, register_provider
 from passrotate.forms import get_form
-import requests
 from urllib.parse import urlparse
 
 class Twitter(Provider):
@@ -11,7 +10,6 @@ class Twitter(Provider):
     name = "Twitter"
     domains = [
         "twitter.com",
-        "m.twitter.com"
     ]
     options = {
         "username": ProviderOption(str, "Your Twitter username")
@@ -21,7 +19,7 @@ class Twitter(Provider):
         self.username = options["username"]
 
     def prepare(self, old_password):
-        self._session = requests.Session()
+        self._session = self.new_session()
         r = self._session.get("https://mobile.twitter.com/login")
         tk = self._session.cookies.get("_mb_tk")
         if not tk or r.status_code != 200:
@@ -1,6 +1,6 @@
 from passrotate.provider import Provider, ProviderOption, register_provider
 from passrotate.forms import get_form
-import requests
+from passrotate.formcache import get_cached_form
 
 class Wikipedia(Provider):
     """
@@ -23,8 +23,8 @@ class Wikipedia(Provider):
         self.username = options["username"]
 
     def _login(self, old_password):
-        r = self._session.get(self._login_url)
-        form = get_form(r.text)
+        form = get_cached_form(self.name + ".login",
+                lambda: self._session.get(self._login_url).text)
         form.update({
             "wpName": self.username,
             "wpPassword": old_password
@@ -35,7 +35,7 @@ class Wikipedia(Provider):
         return r
 
     def prepare(self, old_password):
-        self._session = requests.Session()
+        self._session = self.new_session()
         self._login(old_password)
         r = self._session.get(self._password_change_url)
         self._form = get_form(r.text)
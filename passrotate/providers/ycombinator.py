@@ -1,6 +1,5 @@
 from passrotate.provider import Provider, ProviderOption, register_provider
 from passrotate.forms import get_form
-import requests
 
 class YCombinator(Provider):
     """
@@ -10,7 +9,6 @@ class YCombinator(Provider):
     name = "YCombinator"
     domains = [
         "ycombinator.com",
-        "news.ycombinator.com"
     ]
     options = {
         "username": ProviderOption(str, "Your Hacker News username")
@@ -20,7 +18,7 @@ class YCombinator(Provider):
         self.username = options["username"]
 
     def prepare(self, old_password):
-        self._session = requests.Session()
+        self._session = self.new_session()
         r = self._session.post("https://news.ycombinator.com/login", data={
             "acct": self.username,
             "pw": old_password
@@ -1,5 +1,4 @@
 from passrotate.provider import Provider, ProviderOption, register_provider
-import requests
 
 
 class Zotero(Provider):
@@ -10,7 +9,6 @@ class Zotero(Provider):
     name = "Zotero"
     domains = [
         "zotero.org",
-        "www.zotero.org"
     ]
     options = {
         "username": ProviderOption(str, "Your Zotero username")
@@ -20,7 +18,7 @@ class Zotero(Provider):
         self.username = options["username"]
 
     def prepare(self, old_password):
-        self._session = requests.Session()
+        self._session = self.new_session()
         self._session.get("https://www.zotero.org/user/login")
         r = self._session.post("https://www.zotero.org/user/login", data={
             "username": self.username,
@@ -0,0 +1,114 @@
+from urllib.parse import urlparse
+import time
+import requests
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class Deadline:
+    """A time budget, optionally nested inside a larger one.
+
+    Parameters:
+        seconds: The budget in seconds from now, or None for no limit.
+        parent: An enclosing Deadline, e.g. the deadline for the whole run.
+    """
+    def __init__(self, seconds=None, parent=None):
+        self.expires = time.monotonic() + seconds if seconds else None
+        self.parent = parent
+
+    def remaining(self):
+        """Returns the seconds left in the budget, or None if unlimited."""
+        remaining = None
+        if self.expires is not None:
+            remaining = self.expires - time.monotonic()
+        if self.parent:
+            parent = self.parent.remaining()
+            if parent is not None and (remaining is None or parent < remaining):
+                remaining = parent
+        return remaining
+
+    def expired(self):
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def disarm(self):
+        """Removes the limit, once the work it guards must not be interrupted.
+
+        For example, once a new password has been stored, the request which
+        sets it on the service should not be cancelled half way through.
+        """
+        self.expires = None
+        self.parent = None
+
+    def check(self):
+        if self.expired():
+            raise DeadlineExceeded("Deadline exceeded")
+
+
+class Session(requests.Session):
+    """A requests.Session which applies a default timeout to every request.
+
+    If a deadline is given, no request is started once it has expired, and
+    each request's timeout is capped to the time remaining.
+
+    If a url_map is given, requests and redirects to any of its origins (e.g.
+    "https://github.com") are sent to the corresponding replacement origin
+    instead, e.g. a fake server from passrotate.testing.
+
+    If a tracer (see passrotate.tracing) is given, each request is recorded
+    as a span. The query string is left out, since it may contain secrets.
+
+    A deadline may also be passed to an individual request, which is useful
+    when one session is shared by several accounts.
+    """
+    def __init__(self, timeout=None, deadline=None, url_map=None, tracer=None):
+        super().__init__()
+        self.timeout = timeout
+        self.deadline = deadline
+        self.url_map = url_map or dict()
+        self.tracer = tracer
+
+    def rewrite_url(self, url):
+        for origin, replacement in self.url_map.items():
+            if url == origin or url.startswith(origin + "/") \
+                    or url.startswith(origin + "?"):
+                return replacement + url[len(origin):]
+        return url
+
+    def get_redirect_target(self, resp):
+        url = super().get_redirect_target(resp)
+        if url and self.url_map:
+            url = self.rewrite_url(url)
+        return url
+
+    def request(self, method, url, **kwargs):
+        if self.tracer:
+            return self._traced_request(method, url, **kwargs)
+        return self._request(method, url, **kwargs)
+
+    def _traced_request(self, method, url, **kwargs):
+        parsed = urlparse(url)
+        with self.tracer.span("{} {}{}".format(method, parsed.netloc, parsed.path),
+                "http", method=method, host=parsed.netloc, path=parsed.path) as args:
+            r = self._request(method, url, **kwargs)
+            args.update({
+                "status": r.status_code,
+                "bytes": len(r.content),
+                "redirects": len(r.history),
+            })
+            return r
+
+    def _request(self, method, url, **kwargs):
+        if self.url_map:
+            url = self.rewrite_url(url)
+        timeout = kwargs.get("timeout") or self.timeout
+        deadline = kwargs.pop("deadline", None) or self.deadline
+        if deadline:
+            deadline.check()
+            remaining = deadline.remaining()
+            if remaining is not None and (timeout is None or remaining < timeout):
+                timeout = remaining
+        kwargs["timeout"] = timeout
+        return super().request(method, url, **kwargs)
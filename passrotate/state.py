@@ -0,0 +1,132 @@
+import json
+import os
+import threading
+import time
+
+_age_units = {
+    "h": 1 / 24,
+    "d": 1,
+    "w": 7,
+}
+
+
+def parse_age(value):
+    """Parses a maximum password age into a number of days.
+
+    Parameters:
+        value: A number of days, optionally suffixed with "h" (hours), "d"
+               (days) or "w" (weeks), e.g. "90", "12h" or "4w".
+
+    Returns the age in days as a float, or None if value is empty.
+    """
+    value = (value or "").strip().lower()
+    if not value:
+        return None
+    unit = 1
+    if value[-1] in _age_units:
+        unit = _age_units[value[-1]]
+        value = value[:-1]
+    return float(value) * unit
+
+
+class RotationState:
+    """Persistent index of when each account was last rotated.
+
+    The index is a JSON file mapping account names to a record with the
+    timestamps of the last successful and failed rotation, how long the last
+    attempt took, the account's provider, and whether the operator had to be
+    prompted for anything.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.accounts = dict()
+        self._lock = threading.Lock()
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                self.accounts = json.load(f)
+        except FileNotFoundError:
+            self.accounts = dict()
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with self._lock:
+            with open(tmp, "w") as f:
+                json.dump(self.accounts, f, indent=2, sort_keys=True)
+            os.replace(tmp, self.path)
+
+    def get(self, account):
+        return self.accounts.get(account, dict())
+
+    def _record(self, account, key, duration_key, duration, when, provider,
+            interactive):
+        with self._lock:
+            record = self.accounts.setdefault(account, dict())
+            record[key] = when or time.time()
+            record[duration_key] = duration
+            if provider:
+                record["provider"] = provider
+            if interactive is not None:
+                record["interactive"] = interactive
+
+    def record_success(self, account, duration, when=None,
+            provider=None, interactive=None):
+        self._record(account, "last_success", "duration", duration, when,
+                provider, interactive)
+
+    def record_failure(self, account, duration, when=None,
+            provider=None, interactive=None):
+        # A failure can end early, e.g. at a wrong password, or run into the
+        # deadline, so its duration is kept apart from the one used to
+        # schedule the account
+        self._record(account, "last_failure", "last_failure_duration", duration,
+                when, provider, interactive)
+
+    def provider_durations(self):
+        """Returns the mean duration of the last successful rotations for
+        each provider.
+
+        This estimates how long an account which has never been rotated will
+        take, from the other accounts using its provider.
+        """
+        totals = dict()
+        with self._lock:
+            for record in self.accounts.values():
+                if record.get("provider") and "duration" in record:
+                    total = totals.setdefault(record["provider"], [0, 0])
+                    total[0] += record["duration"]
+                    total[1] += 1
+        return { p: t / n for p, (t, n) in totals.items() }
+
+    def is_interactive(self, account):
+        """Checks whether the account's last attempt prompted the operator."""
+        return bool(self.get(account).get("interactive"))
+
+    def is_due(self, account, max_age, now=None):
+        """Checks whether an account has gone unrotated for too long.
+
+        Parameters:
+            account: The account name.
+            max_age: The maximum password age in days.
+            now: The current time, defaults to time.time().
+
+        Returns True if the account has never been rotated successfully, or
+        if its last successful rotation is older than max_age.
+        """
+        last_success = self.get(account).get("last_success")
+        if last_success is None:
+            return True
+        now = now or time.time()
+        return now - last_success > max_age * 86400
+
+
+def default_state_path():
+    if os.environ.get("XDG_DATA_HOME"):
+        base = os.environ.get("XDG_DATA_HOME")
+    else:
+        base = os.path.expanduser("~/.local/share")
+    return os.path.join(base, "pass-rotate", "state.json")
@@ -0,0 +1,4 @@
+from passrotate.testing.server import FakeService, FakeServer, FakeFleet, \
+        FakeUser, Request, Response, route
+from passrotate.testing.services import FakeGitHub, FakeGitLab, FakeLinode, \
+        FakeDiscord, FakeHackerNews, services
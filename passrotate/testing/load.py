@@ -0,0 +1,177 @@
+"""Load test pass-rotate against a local fleet of fake service providers.
+
+Run with python -m passrotate.testing.load.
+
+Usage:
+  passrotate.testing.load [options]
+
+Options:
+  --accounts=<n>  Number of synthetic accounts to rotate [default: 1000]
+  --jobs=<n>      Number of accounts to rotate at once [default: 8]
+  --parse-workers=<n>  Passed on to pass-rotate [default: 0]
+  --two-factor    Enable TOTP two-factor authentication for every account,
+                  with the secret in the config
+  --bulk          Run pass-rotate with --bulk
+  --wrong-passwords=<n>  Store a wrong current password for n of the accounts,
+                  which must then fail without changing anything [default: 0]
+  --cli=<path>    Path to the pass-rotate script (default: next to the
+                  passrotate package, or on $PATH)
+  --keep=<dir>    Write the generated config, password store and state to
+                  <dir> and keep them afterwards
+"""
+
+from passrotate.testing.server import FakeFleet
+from passrotate.testing.services import FakeDiscord, services
+from docopt import docopt
+import base64
+import json
+import os
+import secrets
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+_domains = {
+    "FakeGitHub": "github.com",
+    "FakeGitLab": "gitlab.com",
+    "FakeLinode": "linode.com",
+    "FakeDiscord": "discordapp.com",
+    "FakeHackerNews": "news.ycombinator.com",
+}
+
+
+def find_cli():
+    path = os.path.join(os.path.dirname(__file__), "..", "..", "pass-rotate")
+    if os.path.exists(path):
+        return os.path.abspath(path)
+    return shutil.which("pass-rotate")
+
+
+def percentile(values, p):
+    """Returns the nearest-rank p-th percentile of a sorted list."""
+    if not values:
+        return 0
+    return values[min(len(values) - 1, max(0, int(round(p / 100 * len(values))) - 1))]
+
+
+def write_inventory(directory, fleet, count, two_factor=False, wrong=0):
+    """Creates synthetic accounts on the fleet and a config to rotate them.
+
+    The first wrong accounts are given a different password in the store than
+    on the fleet.
+
+    Returns the path to the config file and a dict mapping each account name
+    to its fake user.
+    """
+    store = os.path.join(directory, "store")
+    os.makedirs(store, exist_ok=True)
+    url_map = "".join("\n    {} {}".format(origin, url)
+            for origin, url in fleet.url_map.items())
+    lines = [
+        "[pass-rotate]",
+        "get-password=cat \"{}/$ACCOUNT\"".format(store),
+        "set-password=cat > \"{}/$ACCOUNT\"".format(store),
+        "state-file={}".format(os.path.join(directory, "state.json")),
+        "form-cache={}".format(os.path.join(directory, "forms.json")),
+        "max-age=0",
+        "url-map={}".format(url_map),
+        "",
+    ]
+    users = dict()
+    for i in range(count):
+        server = fleet.servers[i % len(fleet.servers)]
+        service = server.service
+        account = "account-{:06}".format(i)
+        password = "initial-{:06}".format(i)
+        otp = None
+        if two_factor:
+            otp = base64.b32encode(secrets.token_bytes(10)).decode()
+        users[account] = service.add_user(account, password, otp)
+        with open(os.path.join(store, account), "w") as f:
+            f.write(("wrong-{:06}".format(i) if i < wrong else password) + "\n")
+        lines.append("[{}]".format(account))
+        lines.append("domain={}".format(_domains[type(service).__name__]))
+        if isinstance(service, FakeDiscord):
+            lines.append("email={}".format(account))
+        else:
+            lines.append("username={}".format(account))
+        if otp:
+            lines.append("totp-secret={}".format(otp))
+        lines.append("")
+    path = os.path.join(directory, "pass-rotate.ini")
+    with open(path, "w") as f:
+        f.write("\n".join(lines))
+    return path, users
+
+
+def run(directory, accounts, jobs, cli, two_factor=False, parse_workers=0,
+        bulk=False, wrong=0):
+    with FakeFleet([cls() for cls in services]) as fleet:
+        config, users = write_inventory(directory, fleet, accounts, two_factor, wrong)
+        start = time.monotonic()
+        command = [sys.executable, cli, "--config=" + config,
+            "--jobs={}".format(jobs),
+            "--parse-workers={}".format(parse_workers), "--due"]
+        if bulk:
+            command.append("--bulk")
+        with open(os.path.join(directory, "output.txt"), "w") as output:
+            subprocess.run(command,
+                stdin=subprocess.DEVNULL, stdout=output, stderr=output)
+        elapsed = time.monotonic() - start
+        served = sum(s.service.requests for s in fleet.servers)
+
+    with open(os.path.join(directory, "state.json")) as f:
+        state = json.load(f)
+    durations = sorted(r["duration"] for r in state.values() if "last_success" in r)
+    verified = 0
+    rejected = 0
+    for account, user in users.items():
+        with open(os.path.join(directory, "store", account)) as f:
+            stored = f.read().strip()
+        if stored == user.password and not user.password.startswith("initial-"):
+            verified += 1
+        elif stored.startswith("wrong-") and user.password.startswith("initial-") \
+                and "last_success" not in state.get(account, dict()):
+            rejected += 1
+
+    print("Accounts:      {}".format(accounts))
+    print("Rotated:       {}".format(len(durations)))
+    print("Verified:      {}".format(verified))
+    if wrong:
+        print("Rejected:      {} of {} wrong passwords".format(rejected, wrong))
+    print("Failed:        {}".format(accounts - len(durations)))
+    print("Requests:      {}".format(served))
+    print("Elapsed:       {:.2f}s".format(elapsed))
+    print("Throughput:    {:.1f} accounts/s".format(accounts / elapsed))
+    for p in (50, 90, 99, 100):
+        print("Latency p{:<3}   {:.3f}s".format(p, percentile(durations, p)))
+    return verified == accounts - wrong and rejected == wrong
+
+
+def main():
+    args = docopt(__doc__)
+    cli = args["--cli"] or find_cli()
+    if not cli:
+        sys.stderr.write("Unable to find the pass-rotate script, use --cli\n")
+        sys.exit(1)
+    accounts = int(args["--accounts"])
+    jobs = int(args["--jobs"])
+    options = {
+        "two_factor": args["--two-factor"],
+        "parse_workers": int(args["--parse-workers"]),
+        "bulk": args["--bulk"],
+        "wrong": int(args["--wrong-passwords"]),
+    }
+    if args["--keep"]:
+        os.makedirs(args["--keep"], exist_ok=True)
+        ok = run(args["--keep"], accounts, jobs, cli, **options)
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            ok = run(directory, accounts, jobs, cli, **options)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from passrotate.totp import decode_secret, hotp
+import html
+import json
+import secrets
+import threading
+import time
+
+
+class Request:
+    def __init__(self, method, path, query, headers, body):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+        cookie = SimpleCookie(headers.get("Cookie", ""))
+        self.cookies = { k: v.value for k, v in cookie.items() }
+
+    @property
+    def form(self):
+        return { k: v[-1] for k, v in
+                parse_qs(self.body.decode(), keep_blank_values=True).items() }
+
+    @property
+    def json(self):
+        return json.loads(self.body.decode() or "null")
+
+
+class Response:
+    def __init__(self, body="", status=200, headers=None, content_type="text/html"):
+        self.body = body.encode() if isinstance(body, str) else body
+        self.status = status
+        self.headers = headers or dict()
+        self.headers.setdefault("Content-Type", content_type)
+        self.cookies = dict()
+
+
+def redirect(location, status=302):
+    return Response(status=status, headers={ "Location": location })
+
+
+def json_response(data, status=200):
+    return Response(json.dumps(data), status=status, content_type="application/json")
+
+
+def html_form(fields, **attrs):
+    """Renders an HTML form.
+
+    Parameters:
+        fields: A list of (name, value, type) tuples for each input, with an
+                optional fourth item giving a dict of extra attributes.
+        **attrs: Attributes of the form element. Use action_ for "action".
+
+    Returns the HTML for the form.
+    """
+    def attributes(attrs):
+        return "".join(' {}="{}"'.format(k.rstrip("_"), html.escape(v))
+                for k, v in attrs.items())
+    inputs = "".join("<input{}>".format(attributes(dict(
+            type=f[2], name=f[0], value=f[1], **(f[3] if len(f) > 3 else {}))))
+            for f in fields)
+    return "<form{}>{}</form>".format(attributes(attrs), inputs)
+
+
+def html_page(title, body, meta=None):
+    meta = "".join('<meta name="{}" content="{}">'.format(
+            html.escape(k), html.escape(v)) for k, v in (meta or dict()).items())
+    return ("<!DOCTYPE html><html><head><title>{}</title>{}</head>"
+            "<body>{}</body></html>").format(html.escape(title), meta, body)
+
+
+def route(method, path):
+    """Decorator which marks a FakeService method as the handler for a path.
+
+    A path ending in "/*" matches any last path segment, e.g. "/users/*"
+    matches "/users/42". The handler reads the segment from request.path.
+    """
+    def decorator(func):
+        func.route = (method, path)
+        return func
+    return decorator
+
+
+class FakeUser:
+    """A user of a fake service. otp is the user's TOTP secret, if any."""
+    def __init__(self, id, username, password, otp=None):
+        self.id = id
+        self.username = username
+        self.password = password
+        self.otp = otp
+        self.otp_counter = -1
+
+
+class FakeService:
+    """Base class for a fake service provider.
+
+    Subclasses set origins to the real origins they stand in for, and
+    cookie to the name of their session cookie, then define handlers with
+    the route decorator. Handlers take a Request and a session dict, and
+    return a Response.
+    """
+    origins = []
+    cookie = "session"
+
+    def __init__(self):
+        self.users = dict()
+        self.sessions = dict()
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._routes = dict()
+        for name in dir(type(self)):
+            func = getattr(self, name)
+            if hasattr(func, "route"):
+                self._routes[func.route] = func
+
+    def add_user(self, username, password, otp=None):
+        with self._lock:
+            user = FakeUser(len(self.users) + 1, username, password, otp)
+            self.users[username] = user
+        return user
+
+    def new_token(self):
+        return secrets.token_hex(16)
+
+    def csrf_token(self, session):
+        return session.setdefault("csrf", self.new_token())
+
+    def check_csrf(self, session, token):
+        return bool(token) and token == session.get("csrf")
+
+    def check_otp(self, user, code):
+        """Checks a TOTP code, allowing one step of clock skew either way.
+
+        Like real services, a code which has already been used is refused.
+        """
+        if user.otp is None:
+            return True
+        key, digits, period = decode_secret(user.otp)
+        counter = int(time.time() // period)
+        with self._lock:
+            for c in (counter - 1, counter, counter + 1):
+                if c > user.otp_counter and code == hotp(key, c, digits):
+                    user.otp_counter = c
+                    return True
+        return False
+
+    def current_user(self, session):
+        if not session.get("authenticated"):
+            return None
+        return self.users.get(session.get("user"))
+
+    def handle(self, request):
+        with self._lock:
+            self.requests += 1
+        handler = self._routes.get((request.method, request.path)) or \
+                self._routes.get((request.method, request.path.rsplit("/", 1)[0] + "/*"))
+        if not handler:
+            return Response("Not found", status=404)
+        session_id = request.cookies.get(self.cookie)
+        with self._lock:
+            if session_id not in self.sessions:
+                session_id = self.new_token()
+                self.sessions[session_id] = dict()
+            session = self.sessions[session_id]
+        response = handler(request, session)
+        response.cookies[self.cookie] = session_id
+        return response
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, avoid waiting on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def _dispatch(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        request = Request(self.command, url.path,
+                { k: v[-1] for k, v in parse_qs(url.query).items() },
+                self.headers, body)
+        try:
+            response = self.server.service.handle(request)
+        except Exception as ex:
+            response = Response("Internal error: {}".format(ex), status=500)
+        self.send_response(response.status)
+        for name, value in response.headers.items():
+            self.send_header(name, value)
+        for name, value in response.cookies.items():
+            self.send_header("Set-Cookie", "{}={}; Path=/".format(name, value))
+        self.send_header("Content-Length", str(len(response.body)))
+        self.end_headers()
+        self.wfile.write(response.body)
+
+    do_GET = _dispatch
+    do_POST = _dispatch
+    do_PUT = _dispatch
+    do_PATCH = _dispatch
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class FakeServer:
+    """Serves a FakeService over HTTP on a local port, in a thread."""
+    def __init__(self, service, host="127.0.0.1", port=0):
+        self.service = service
+        self._server = _Server((host, port), _Handler)
+        self._server.service = service
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return "http://{}:{}".format(host, port)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class FakeFleet:
+    """Runs a FakeServer for each of several fake services.
+
+    The url_map property may be passed to PassRotate.set_url_map, or the
+    url-map config option, to point providers at the fleet.
+    """
+    def __init__(self, services):
+        self.servers = [FakeServer(s) for s in services]
+
+    def start(self):
+        for server in self.servers:
+            server.start()
+        return self
+
+    def stop(self):
+        for server in self.servers:
+            server.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def url_map(self):
+        return { origin: server.url for server in self.servers
+                for origin in server.service.origins }
+
+    def service(self, cls):
+        return next(s.service for s in self.servers
+                if isinstance(s.service, cls))
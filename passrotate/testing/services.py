@@ -0,0 +1,387 @@
+from passrotate.testing.server import FakeService, Response, route, redirect, \
+        json_response, html_form, html_page
+
+
+class FakeGitHub(FakeService):
+    origins = ["https://github.com"]
+    cookie = "user_session"
+
+    @route("GET", "/login")
+    def login_page(self, request, session):
+        return Response(html_page("Sign in to GitHub", html_form([
+            ("authenticity_token", self.csrf_token(session), "hidden"),
+            ("login", "", "text"),
+            ("password", "", "password"),
+        ], action_="/session", method="post")))
+
+    @route("POST", "/session")
+    def login(self, request, session):
+        form = request.form
+        user = self.users.get(form.get("login"))
+        if not self.check_csrf(session, form.get("authenticity_token")) \
+                or not user or user.password != form.get("password"):
+            return Response(html_page("Sign in to GitHub",
+                "Incorrect username or password."), status=401)
+        session["user"] = user.username
+        if user.otp:
+            return redirect("/sessions/two-factor")
+        session["authenticated"] = True
+        return redirect("/")
+
+    @route("GET", "/sessions/two-factor")
+    def two_factor_page(self, request, session):
+        return Response(html_page("Two-factor authentication", html_form([
+            ("authenticity_token", self.csrf_token(session), "hidden"),
+            ("otp", "", "text"),
+        ], action_="/sessions/two-factor", method="post")))
+
+    @route("POST", "/sessions/two-factor")
+    def two_factor(self, request, session):
+        form = request.form
+        user = self.users.get(session.get("user"))
+        if not user or not self.check_csrf(session, form.get("authenticity_token")) \
+                or not self.check_otp(user, form.get("otp")):
+            return redirect("/sessions/two-factor")
+        session["authenticated"] = True
+        return redirect("/")
+
+    @route("GET", "/")
+    def home(self, request, session):
+        return Response(html_page("GitHub", "Dashboard"))
+
+    @route("GET", "/settings/admin")
+    def settings(self, request, session):
+        if not self.current_user(session):
+            return redirect("/login")
+        return Response(html_page("Account settings", html_form([
+            ("authenticity_token", self.csrf_token(session), "hidden"),
+            ("_method", "put", "hidden"),
+            ("user[old_password]", "", "password"),
+            ("user[password]", "", "password"),
+            ("user[password_confirmation]", "", "password"),
+        ], id="change_password", action_="/account", method="post")))
+
+    @route("POST", "/account")
+    def change_password(self, request, session):
+        form = request.form
+        user = self.current_user(session)
+        if not user or not self.check_csrf(session, form.get("authenticity_token")) \
+                or form.get("user[old_password]") != user.password \
+                or form.get("user[password]") != form.get("user[password_confirmation]"):
+            return Response(html_page("Account settings", "Password change failed"),
+                    status=422)
+        user.password = form["user[password]"]
+        return redirect("/settings/admin")
+
+
+class FakeGitLab(FakeService):
+    origins = ["https://gitlab.com"]
+    cookie = "_gitlab_session"
+
+    def __init__(self):
+        super().__init__()
+        self.admin_tokens = set()
+
+    def add_admin_token(self):
+        token = self.new_token()
+        self.admin_tokens.add(token)
+        return token
+
+    def _is_admin(self, request):
+        return request.headers.get("Private-Token") in self.admin_tokens
+
+    def _sign_in_page(self, session, message=""):
+        # Like GitLab, failed sign ins render this page again with a 200
+        return Response(html_page("Sign in - GitLab", message + html_form([
+            ("authenticity_token", self.csrf_token(session), "hidden"),
+            ("user[login]", "", "text"),
+            ("user[password]", "", "password"),
+        ], action_="/users/sign_in", method="post"),
+            meta={ "csrf-token": self.csrf_token(session) }))
+
+    @route("GET", "/users/sign_in")
+    def login_page(self, request, session):
+        return self._sign_in_page(session)
+
+    @route("POST", "/users/sign_in")
+    def login(self, request, session):
+        form = request.form
+        if not self.check_csrf(session, form.get("authenticity_token")):
+            return Response(html_page("Sign in - GitLab", "Invalid token"), status=422)
+        if "user[otp_attempt]" in form:
+            user = self.users.get(session.get("user"))
+            if not user or not self.check_otp(user, form.get("user[otp_attempt]")):
+                return self._sign_in_page(session, "Invalid two-factor code.")
+            session["authenticated"] = True
+            return redirect("/")
+        user = self.users.get(form.get("user[login]"))
+        if not user or user.password != form.get("user[password]"):
+            return self._sign_in_page(session, "Invalid login or password.")
+        session["user"] = user.username
+        if user.otp:
+            return Response(html_page("Two-factor authentication", html_form([
+                ("authenticity_token", self.csrf_token(session), "hidden"),
+                ("user[otp_attempt]", "", "text", { "id": "user_otp_attempt" }),
+            ], action_="/users/sign_in", method="post"),
+                meta={ "csrf-token": self.csrf_token(session) }))
+        session["authenticated"] = True
+        return redirect("/")
+
+    @route("GET", "/")
+    def home(self, request, session):
+        return Response(html_page("Projects - GitLab", "Projects",
+            meta={ "csrf-token": self.csrf_token(session) }))
+
+    @route("GET", "/api/v4/user")
+    def api_user(self, request, session):
+        user = self.current_user(session)
+        if not user:
+            return json_response({ "message": "401 Unauthorized" }, status=401)
+        return json_response({ "id": user.id, "username": user.username })
+
+    @route("GET", "/api/v4/users")
+    def api_users(self, request, session):
+        if not self._is_admin(request):
+            return json_response({ "message": "401 Unauthorized" }, status=401)
+        user = self.users.get(request.query.get("username"))
+        return json_response([{ "id": user.id, "username": user.username }]
+                if user else [])
+
+    @route("PUT", "/api/v4/users/*")
+    def api_update_user(self, request, session):
+        if not self._is_admin(request):
+            return json_response({ "message": "401 Unauthorized" }, status=401)
+        user_id = request.path.rsplit("/", 1)[1]
+        user = next((u for u in self.users.values() if str(u.id) == user_id), None)
+        if not user:
+            return json_response({ "message": "404 User Not Found" }, status=404)
+        password = (request.json or dict()).get("password")
+        if password:
+            user.password = password
+        return json_response({ "id": user.id, "username": user.username })
+
+    @route("GET", "/profile/password/edit")
+    def password_page(self, request, session):
+        user = self.current_user(session)
+        if not user:
+            return redirect("/users/sign_in")
+        return Response(html_page("Password - GitLab", html_form([
+            ("utf8", "✓", "hidden"),
+            ("_method", "put", "hidden"),
+            ("authenticity_token", self.csrf_token(session), "hidden"),
+            ("user[current_password]", "", "password"),
+            ("user[password]", "", "password"),
+            ("user[password_confirmation]", "", "password"),
+        ], id="edit_user_{}".format(user.id),
+            action_="/profile/password", method="post")))
+
+    @route("POST", "/profile/password")
+    def change_password(self, request, session):
+        form = request.form
+        user = self.current_user(session)
+        if not user or not self.check_csrf(session, form.get("authenticity_token")) \
+                or form.get("user[current_password]") != user.password \
+                or form.get("user[password]") != form.get("user[password_confirmation]"):
+            return Response(html_page("Password - GitLab", "Password change failed"),
+                    status=422)
+        user.password = form["user[password]"]
+        session["authenticated"] = False
+        return redirect("/users/sign_in")
+
+
+class FakeLinode(FakeService):
+    origins = ["https://manager.linode.com"]
+    cookie = "lm_session"
+
+    @route("GET", "/")
+    def login_page(self, request, session):
+        return Response(html_page("Linode Manager", html_form([
+            ("auth_username", "", "text"),
+            ("auth_password", "", "password"),
+            ("token", self.csrf_token(session), "hidden"),
+        ], id="CFForm_1", action_="/session/login", method="post")))
+
+    @route("POST", "/session/login")
+    def login(self, request, session):
+        form = request.form
+        user = self.users.get(form.get("auth_username"))
+        if not self.check_csrf(session, form.get("token")) \
+                or not user or user.password != form.get("auth_password"):
+            return Response(html_page("Linode Manager", "Login failed"))
+        session["user"] = user.username
+        session["authenticated"] = not user.otp
+        return Response(html_page("Session Engaged!", "Welcome back"))
+
+    @route("GET", "/linodes")
+    def linodes(self, request, session):
+        if session.get("user") and not session.get("authenticated"):
+            return redirect("/session/twofactor")
+        if not self.current_user(session):
+            return redirect("/")
+        return Response(html_page("Linodes", "Your Linodes"))
+
+    @route("GET", "/session/twofactor")
+    def two_factor_page(self, request, session):
+        return Response(html_page("Two-Factor Authentication", html_form([
+            ("auth_code", "", "text"),
+        ], id="CFForm_1", action_=self.origins[0] + "/session/twofactor_auth",
+            method="post")))
+
+    @route("POST", "/session/twofactor_auth")
+    def two_factor(self, request, session):
+        user = self.users.get(session.get("user"))
+        if not user or not self.check_otp(user, request.form.get("auth_code")):
+            return redirect("/session/twofactor")
+        session["authenticated"] = True
+        return redirect("/linodes")
+
+    @route("GET", "/profile/index")
+    def profile(self, request, session):
+        if not self.current_user(session):
+            return redirect("/")
+        return Response(html_page("My Profile", html_form([
+            ("authenticity_token", self.csrf_token(session), "hidden"),
+            ("auth_password", "", "password"),
+        ], action_="/profile/reauth", method="post")))
+
+    @route("POST", "/profile/reauth")
+    def reauth(self, request, session):
+        form = request.form
+        user = self.current_user(session)
+        if user and self.check_csrf(session, form.get("authenticity_token")) \
+                and form.get("auth_password") == user.password:
+            session["reauthenticated"] = True
+        return redirect("/profile/auth")
+
+    @route("GET", "/profile/auth")
+    def auth_page(self, request, session):
+        if not session.get("reauthenticated"):
+            return redirect("/profile/index")
+        return Response(html_page("Password & Authentication", html_form([
+            ("authenticity_token", self.csrf_token(session), "hidden"),
+            ("password", "", "password"),
+            ("password2", "", "password"),
+        ], action_="/profile/password", method="post")))
+
+    @route("POST", "/profile/password")
+    def change_password(self, request, session):
+        form = request.form
+        user = self.current_user(session)
+        if not user or not session.get("reauthenticated") \
+                or not self.check_csrf(session, form.get("authenticity_token")) \
+                or not form.get("password") \
+                or form.get("password") != form.get("password2") \
+                or form.get("expires") not in ("0", "1", "3", "6", "12"):
+            return Response(html_page("Password & Authentication",
+                "Password change failed"), status=400)
+        user.password = form["password"]
+        return Response(html_page("Password & Authentication", "Password changed"))
+
+
+class FakeDiscord(FakeService):
+    origins = ["https://discordapp.com"]
+    cookie = "__dcfduid"
+
+    def __init__(self):
+        super().__init__()
+        self.tokens = dict()
+        self.tickets = dict()
+
+    def _user_by_email(self, email):
+        return self.users.get(email)
+
+    @route("POST", "/api/v6/auth/login")
+    def login(self, request, session):
+        data = request.json or dict()
+        user = self._user_by_email(data.get("email"))
+        if not user or user.password != data.get("password"):
+            return json_response({ "code": 50035,
+                "message": "Invalid Form Body" }, status=400)
+        if user.otp:
+            ticket = self.new_token()
+            with self._lock:
+                self.tickets[ticket] = user.username
+            return json_response({ "mfa": True, "sms": False,
+                "ticket": ticket, "token": None })
+        return json_response({ "token": self._issue_token(user) })
+
+    def _issue_token(self, user):
+        token = self.new_token()
+        with self._lock:
+            self.tokens[token] = user.username
+        return token
+
+    @route("POST", "/api/v6/auth/mfa/totp")
+    def mfa(self, request, session):
+        data = request.json or dict()
+        with self._lock:
+            username = self.tickets.get(data.get("ticket"))
+        user = self.users.get(username)
+        if not user or not self.check_otp(user, data.get("code")):
+            return json_response({ "code": 60008,
+                "message": "Invalid two-factor code" }, status=400)
+        with self._lock:
+            del self.tickets[data.get("ticket")]
+        return json_response({ "token": self._issue_token(user) })
+
+    @route("PATCH", "/api/v6/users/@me")
+    def update_user(self, request, session):
+        data = request.json or dict()
+        user = self.users.get(self.tokens.get(request.headers.get("authorization")))
+        if not user:
+            return json_response({ "code": 0, "message": "401: Unauthorized" },
+                    status=401)
+        if user.password != data.get("password"):
+            return json_response({ "code": 50035,
+                "message": "Invalid Form Body" }, status=400)
+        if user.otp and not self.check_otp(user, data.get("code")):
+            return json_response({ "code": 60008,
+                "message": "Invalid two-factor code" }, status=400)
+        user.password = data.get("new_password")
+        return json_response({ "id": user.username, "email": user.username,
+            "token": self._issue_token(user) })
+
+
+class FakeHackerNews(FakeService):
+    origins = ["https://news.ycombinator.com"]
+    cookie = "user"
+
+    @route("POST", "/login")
+    def login(self, request, session):
+        form = request.form
+        user = self.users.get(form.get("acct"))
+        if not user or user.password != form.get("pw"):
+            return Response("Bad login.")
+        session["user"] = user.username
+        session["authenticated"] = True
+        return redirect("/news")
+
+    @route("GET", "/changepw")
+    def password_page(self, request, session):
+        if not self.current_user(session):
+            return redirect("/login")
+        return Response(html_page("Change Password | Hacker News", html_form([
+            ("fnid", self.csrf_token(session), "hidden"),
+            ("fnop", "changepw-page", "hidden"),
+            ("oldpw", "", "password"),
+            ("pw", "", "password"),
+        ], action_="/r", method="post")))
+
+    @route("POST", "/r")
+    def change_password(self, request, session):
+        form = request.form
+        user = self.current_user(session)
+        if not user or not self.check_csrf(session, form.get("fnid")) \
+                or form.get("oldpw") != user.password or not form.get("pw"):
+            return Response("Unknown or expired link.")
+        user.password = form["pw"]
+        return redirect("/news")
+
+
+services = [
+    FakeGitHub,
+    FakeGitLab,
+    FakeLinode,
+    FakeDiscord,
+    FakeHackerNews,
+]
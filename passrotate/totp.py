@@ -0,0 +1,94 @@
+from passrotate.provider import PromptType
+from urllib.parse import urlparse, parse_qs
+import base64
+import hashlib
+import hmac
+import struct
+import threading
+import time
+
+_last_counters = dict()
+_lock = threading.Lock()
+
+
+def decode_secret(secret):
+    """Decodes a TOTP secret.
+
+    Parameters:
+        secret: A base32 secret, as shown by most services when enabling
+                two-factor authentication, or an otpauth:// URI.
+
+    Returns a (key, digits, period) tuple.
+    """
+    secret = secret.strip()
+    digits, period = 6, 30
+    if secret.startswith("otpauth://"):
+        query = parse_qs(urlparse(secret).query)
+        digits = int(query.get("digits", [digits])[0])
+        period = int(query.get("period", [period])[0])
+        secret = query["secret"][0]
+    secret = secret.replace(" ", "").replace("-", "").upper()
+    secret += "=" * (-len(secret) % 8)
+    return base64.b32decode(secret), digits, period
+
+
+def hotp(key, counter, digits=6):
+    """Computes an RFC 4226 HOTP code for the given counter."""
+    mac = hmac.new(key, struct.pack(">Q", counter), hashlib.sha1).digest()
+    offset = mac[-1] & 0x0F
+    code = struct.unpack(">I", mac[offset:offset + 4])[0] & 0x7FFFFFFF
+    return str(code % 10 ** digits).zfill(digits)
+
+
+def totp(secret, now=None, skew=0):
+    """Computes the RFC 6238 TOTP code for a secret at the given time."""
+    key, digits, period = decode_secret(secret)
+    now = (now or time.time()) + skew
+    return hotp(key, int(now // period), digits)
+
+
+class TotpResponder:
+    """A prompt function which answers TOTP prompts with generated codes.
+
+    Services generally refuse a code which has already been used, so when a
+    code is needed again within the same time step, for example because the
+    service asks for it twice, this waits for the next step rather than
+    reusing it.
+
+    Parameters:
+        secret: The TOTP secret (see decode_secret), or a function which
+                returns it. The function is called the first time a code is
+                needed.
+        fallback: The prompt function to use for other types of prompts.
+        skew: Seconds to add to the local clock, to correct for a local clock
+              which is behind (positive) or ahead (negative) of the service.
+    """
+    def __init__(self, secret, fallback, skew=0):
+        self._secret = secret
+        self.fallback = fallback
+        self.skew = skew
+
+    def secret(self):
+        if callable(self._secret):
+            self._secret = self._secret()
+        return self._secret
+
+    def code(self):
+        secret = self.secret()
+        key, digits, period = decode_secret(secret)
+        with _lock:
+            now = time.time() + self.skew
+            counter = int(now // period)
+            last = _last_counters.get(secret)
+            if last is not None and counter <= last:
+                counter = last + 1
+            _last_counters[secret] = counter
+        wait = counter * period - now
+        if wait > 0:
+            time.sleep(wait)
+        return hotp(key, counter, digits)
+
+    def __call__(self, prompt, prompt_type):
+        if prompt_type == PromptType.totp:
+            return self.code()
+        return self.fallback(prompt, prompt_type)
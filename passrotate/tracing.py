@@ -0,0 +1,71 @@
+from contextlib import contextmanager
+import json
+import os
+import threading
+import time
+
+
+class Tracer:
+    """Records spans in the Chrome trace event format.
+
+    The saved file can be opened in chrome://tracing, Perfetto or
+    speedscope. Spans are recorded per thread, so spans opened while another
+    is open on the same thread are shown nested inside it.
+    """
+    def __init__(self):
+        self.events = list()
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+        self._threads = set()
+        self._lock = threading.Lock()
+
+    def _now(self):
+        return (time.perf_counter() - self._origin) * 1e6
+
+    @contextmanager
+    def span(self, name, category, **args):
+        """Records the duration of a block of code as a span.
+
+        Parameters:
+            name: The name of the span.
+            category: The span category, e.g. "account" or "http".
+            **args: Details to attach to the span.
+
+        Yields the args dict, so that details only known at the end of the
+        span (like a response status) can be added to it.
+        """
+        tid = threading.get_ident()
+        start = self._now()
+        try:
+            yield args
+        except BaseException as ex:
+            args["error"] = type(ex).__name__
+            raise
+        finally:
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": start,
+                "dur": self._now() - start,
+                "pid": self._pid,
+                "tid": tid,
+                "args": args,
+            }
+            with self._lock:
+                self.events.append(event)
+                if tid not in self._threads:
+                    self._threads.add(tid)
+                    self.events.append({
+                        "name": "thread_name",
+                        "ph": "M",
+                        "pid": self._pid,
+                        "tid": tid,
+                        "args": { "name": threading.current_thread().name },
+                    })
+
+    def save(self, path):
+        with self._lock:
+            data = { "traceEvents": list(self.events), "displayTimeUnit": "ms" }
+        with open(path, "w") as f:
+            json.dump(data, f)
@@ -11,6 +11,6 @@ setup(
     license="MIT",
     version="1.0",
     scripts=["pass-rotate"],
-    packages=["passrotate", "passrotate.providers"],
+    packages=["passrotate", "passrotate.providers", "passrotate.testing"],
     install_requires=["beautifulsoup4", "docopt", "requests", "html5lib"]
 )